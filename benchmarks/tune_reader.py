@@ -0,0 +1,78 @@
+"""
+Tune reader benchmark.
+
+Compare the files per second of the two pass reader (audio gateway and
+then ID3 gateway, each one parsing the file) against the single pass
+tune reader, over the mp3 files found on a folder tree.
+
+Note: run it over a folder of several hundred tracks. Drop OS caches
+between runs (or use a cold network share) to measure disk reads too.
+
+    python benchmarks/tune_reader.py /path/to/music/folder/ [rounds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pyd3 import audiogateway as audiog
+from pyd3.id3gateway import Id3Gw
+from pyd3.tunereader import read_tune
+
+def get_mp3_files(the_path):
+    """
+    Get mp3 files from a folder tree.
+
+    Arguments:
+    :param the_path: string e.g.: /path/to/music/folder/
+
+    :return: list
+    """
+    mp3_files = []
+    for (path, dirs, files) in os.walk(the_path):
+        mp3_files.extend(os.path.join(path, f) for f in files if f.endswith('.mp3'))
+    return mp3_files
+
+def two_pass(mp3_file):
+    return (audiog.get_audio_tune(mp3_file), Id3Gw(mp3_file))
+
+def single_pass(mp3_file):
+    return read_tune(mp3_file)
+
+def bench(reader, mp3_files, rounds):
+    """
+    Get the best files per second rate of a reader.
+
+    Arguments:
+    :param reader: function
+    :param mp3_files: list
+    :param rounds: integer
+
+    :return: float
+    """
+    best = 0.0
+    for i in range(rounds):
+        start = time.time()
+        for mp3_file in mp3_files:
+            reader(mp3_file)
+        elapsed = time.time() - start
+        best = max(best, len(mp3_files)/elapsed if elapsed else 0.0)
+    return best
+
+if __name__ == '__main__':
+    try:
+        the_path = sys.argv[1]
+        rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    except (IndexError, ValueError):
+        sys.exit(__doc__)
+
+    mp3_files = get_mp3_files(the_path)
+    if not mp3_files: sys.exit("There are no mp3 files on %s path." %(the_path))
+
+    before = bench(two_pass, mp3_files, rounds)
+    after = bench(single_pass, mp3_files, rounds)
+    print "%i tunes, best of %i rounds." %(len(mp3_files), rounds)
+    print "two pass reader   : %8.1f files/s" %(before)
+    print "single pass reader: %8.1f files/s (x%0.2f)" %(after, after/before if before else 0.0)
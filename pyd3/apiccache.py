@@ -0,0 +1,86 @@
+"""
+APIC cache :: apiccache
+
+Attached picture (APIC) payloads, read once and shared by every tune.
+
+An image is read, its MIME type detected and, optionally, it is converted
+(e.g.: resized) just once. Payloads are found by image file (path, size
+and modification time) and by image content hash, so the same cover on
+several folders is also prepared once.
+"""
+
+import os
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+
+import imgprobe
+
+class ApicCache:
+
+    def __init__(self, convert=None, max_images=32):
+        """
+        Arguments:
+        :param convert: function -- convert(data, mime) returns a tuple (data, mime), if images are converted
+        :param max_images: integer -- max number of payloads held, least recently used ones are dropped
+        """
+        self.convert = convert
+        self.max_images = max_images
+        self.by_file = {}
+        self.by_hash = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+
+    def get(self, image_file):
+        """
+        Get the APIC payload of an image file.
+
+        Arguments:
+        :param image_file: string e.g.: /path/image_file.ext
+
+        :return: tuple -- (mime, data)
+        """
+        st = os.stat(image_file)
+        file_key = (image_file, st.st_size, st.st_mtime)
+        with self.lock:
+            content_hash = self.by_file.get(file_key)
+            if content_hash in self.by_hash:
+                self.by_hash[content_hash] = self.by_hash.pop(content_hash)
+                self.stats['hits'] += 1
+                return self.by_hash[content_hash]
+
+        with open(image_file, 'rb') as f:
+            data = f.read()
+        content_hash = hashlib.sha1(data).hexdigest()
+
+        with self.lock:
+            if content_hash in self.by_hash:
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+                self.by_hash[content_hash] = self.get_payload(image_file, data)
+                while len(self.by_hash) > self.max_images:
+                    self.by_hash.popitem(last=False)
+            self.by_file[file_key] = content_hash
+            return self.by_hash[content_hash]
+
+
+    def get_payload(self, image_file, data):
+        """
+        Get the APIC payload of image data: MIME type is detected from data (from filename otherwise)
+        and image is converted, if images are converted.
+
+        Arguments:
+        :param image_file: string e.g.: /path/image_file.ext
+        :param data: string -- image file data
+
+        :return: tuple -- (mime, data)
+        """
+        probe = imgprobe.probe_data(data)
+        mime = imgprobe.get_mime(probe[0]) if probe else None
+        if mime is None: mime = mimetypes.guess_type(image_file)[0]
+        if self.convert is not None:
+            (data, mime) = self.convert(data, mime)
+        return (mime, data)
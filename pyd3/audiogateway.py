@@ -30,9 +30,38 @@ def open_mp3(mp3_file):
         pass
     return mp3
 
-def get_audio_tune(mp3_file):
+def get_audio_info(mp3_file, audio=None, info=None):
     """
-    Get audio information from a mp3 file.
+    Get raw audio information from a mp3 file.
+    
+    size    -- file size, in bytes
+    length  -- audio length, in seconds
+    bitrate -- audio bitrate, in bits per second
+    version -- MPEG version (1, 2, 2.5)
+    layer   -- 1, 2, or 3
+    mode    -- One of STEREO, JOINTSTEREO, DUALCHANNEL, or MONO (0-3)
+    samplerate -- audio sample rate, in Hz
+    
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+    :param audio: mutagen mp3 class object -- already opened mp3_file, if any
+    :param info: mutagen MPEGInfo object -- already opened mp3_file audio stream info, if any
+    
+    :return: dictionary 
+    """
+    if info is None: info = (audio if audio is not None else open_mp3(mp3_file)).info
+    return {'size'   :os.path.getsize(mp3_file),
+        'length' :info.length,
+        'bitrate':info.bitrate,
+        'version':info.version,
+        'layer'  :info.layer,
+        'mode'   :info.mode,
+        'samplerate':info.sample_rate,
+    }
+
+def get_audio_tune(mp3_file, audio=None, info=None):
+    """
+    Get audio information from a mp3 file, on a human easy readable format.
     
     size    -- file size, in mb
     length  -- audio length, in seconds
@@ -44,16 +73,18 @@ def get_audio_tune(mp3_file):
     
     Arguments:
     :param mp3_file: string e.g.: /path/to/file/file.mp3
+    :param audio: mutagen mp3 class object -- already opened mp3_file, if any
+    :param info: mutagen MPEGInfo object -- already opened mp3_file audio stream info, if any
     
     :return: dictionary 
     """
-    audio = open_mp3(mp3_file)
+    if info is None: info = (audio if audio is not None else open_mp3(mp3_file)).info
     return {'size'   :get_file_size(mp3_file),
-        'length' :get_audio_length(audio.info.length),
-        'bitrate':get_audio_bitrate(audio.info.bitrate), 
-        'format' :get_audio_format(audio.info.version, audio.info.layer),
-        'mode'   :get_audio_mode(audio.info.mode),
-        'samplerate':get_audio_samplerate(audio.info.sample_rate),
+        'length' :get_audio_length(info.length),
+        'bitrate':get_audio_bitrate(info.bitrate), 
+        'format' :get_audio_format(info.version, info.layer),
+        'mode'   :get_audio_mode(info.mode),
+        'samplerate':get_audio_samplerate(info.sample_rate),
     }
 
 def get_file_size(file):
@@ -0,0 +1,96 @@
+"""
+Batch :: batch
+
+Rules file and review queue of the headless (batch) mode.
+
+A rules file is a JSON file which replaces the menu prompted for each
+folder. Rules which are not on the file take their default value.
+
+{
+    "skip": {"source_dirs": ["*sample*", "_*"]},
+    "accept": {"min_tunes": 1, "required_tags": ["trackn", "artist", "title"],
+               "single_album": true, "require_cover": false},
+    "va": {"min_artists": 2},
+    "capitalize": ["artist", "album", "title"],
+    "target_dir": "%(artist)s - %(album)s",
+    "va_target_dir": "%(album)s",
+    "non_expected_files": "exclude"
+}
+
+skip               -- folders whose directory name matches a pattern are skipped.
+accept             -- folders which do not comply with them go to the review queue.
+va                 -- a folder is a VA compilation if its tunes have min_artists artists or more.
+capitalize         -- ID3 tags whose values are capitalized.
+target_dir         -- target directory template, ID3 tags and source_dir can be used.
+                      null uses the default PyD3 target directory.
+va_target_dir      -- target directory template for VA compilations.
+non_expected_files -- "include", "exclude" or a list of extensions to include e.g.: [".pdf", ".cue"]
+"""
+
+import copy
+import json
+
+default_rules = {
+    'skip': {'source_dirs': []},
+    'accept': {'min_tunes': 1, 'required_tags': [], 'single_album': False, 'require_cover': False},
+    'va': {'min_artists': 2},
+    'capitalize': [],
+    'target_dir': None,
+    'va_target_dir': None,
+    'non_expected_files': 'exclude',
+}
+
+def load_rules(rules_file):
+    """
+    Load a rules file, completed with default rules.
+
+    Arguments:
+    :param rules_file: string e.g.: /path/to/rules.json
+
+    :return: dictionary
+
+    Raises ValueError if rules file is not valid.
+    """
+    with open(rules_file) as f:
+        file_rules = json.load(f)
+    if not isinstance(file_rules, dict): raise ValueError("rules file must be a JSON object.")
+
+    rules = copy.deepcopy(default_rules)
+    for (key, value) in file_rules.iteritems():
+        if key not in rules: raise ValueError("rule %s is unknown." %(key))
+        if isinstance(rules[key], dict):
+            if not isinstance(value, dict): raise ValueError("rule %s must be a JSON object." %(key))
+            unknown = [k for k in value if k not in rules[key]]
+            if unknown: raise ValueError("rule(s) %s of %s are unknown." %(', '.join(unknown), key))
+            rules[key].update(value)
+        else:
+            rules[key] = value
+
+    policy = rules['non_expected_files']
+    if not isinstance(policy, list) and policy not in ('include', 'exclude'):
+        raise ValueError("non_expected_files rule must be include, exclude or a list of extensions.")
+    return rules
+
+
+class ReviewQueue:
+
+    def __init__(self, queue_file):
+        """
+        Arguments:
+        :param queue_file: string e.g.: /path/to/review.jsonl -- one JSON line per folder to review
+        """
+        self.queue_file = queue_file
+        self.n_folders = 0
+
+
+    def add(self, source_path, reasons):
+        """
+        Add a folder into the review queue.
+
+        Arguments:
+        :param source_path: string e.g.: /music/library/folder/
+        :param reasons: list -- reasons why folder needs a review
+        """
+        with open(self.queue_file, 'a') as f:
+            f.write(json.dumps({'source_path': source_path, 'reasons': reasons}) + '\n')
+        self.n_folders += 1
@@ -0,0 +1,113 @@
+"""
+Copy engine :: copier
+
+Copy files on the fastest way the OS and the filesystems allow. In order:
+    - reflink (FICLONE) -- e.g.: Btrfs, XFS. Data blocks are shared, nothing is copied.
+    - shutil -- copy through user space.
+
+Kernel copies (copy_file_range, sendfile) are not tried, as Python 2 os
+module does not provide them.
+
+Reflink only clones whole files into empty files: covers, extra files,
+and tunes which cannot be written in a single pass. Tunes written by
+tunewriter get a new ID3v2 tag and then their audio range is copied,
+always through user space: a range clone (FICLONERANGE) needs offsets
+aligned to filesystem blocks on both files, which tag sizes do not give.
+Stats count each copy, whole file or range, by the way it was really done.
+
+A way which is not supported for a pair of devices is not tried again for them.
+Stats count which way each file was copied.
+"""
+
+import os
+import errno
+import shutil
+import threading
+
+try: import fcntl
+except ImportError: fcntl = None
+
+FICLONE = 0x40049409
+
+buffer_size = 1024*1024
+
+fallback_errnos = set(getattr(errno, name) for name in
+    ('EXDEV', 'EINVAL', 'ENOSYS', 'ENOTSUP', 'EOPNOTSUPP', 'ENOTTY') if hasattr(errno, name))
+
+stats = {'reflink': 0, 'shutil': 0}
+unsupported = set()
+lock = threading.Lock()
+
+def reflink(source, target, offset, n_bytes):
+    """Clone source file data blocks into target file (whole files only)."""
+    if fcntl is None or offset != 0 or target.tell() != 0: return False
+    if n_bytes != os.fstat(source.fileno()).st_size: return False
+    fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+    target.seek(n_bytes)
+    return True
+
+def user_space(source, target, offset, n_bytes):
+    """Copy a range reading and writing it through user space buffers."""
+    source.seek(offset)
+    while n_bytes > 0:
+        data = source.read(min(buffer_size, n_bytes))
+        if not data: break
+        target.write(data)
+        n_bytes -= len(data)
+    return True
+
+ways = (('reflink', reflink), ('shutil', user_space))
+
+def copy_range(source, target, offset, n_bytes):
+    """
+    Copy a range of bytes of a file at the current position of another file.
+    Reflink is only tried for whole files copied into empty files.
+
+    Arguments:
+    :param source: file object -- opened on binary mode
+    :param target: file object -- opened on binary mode
+    :param offset: integer -- source position where range starts
+    :param n_bytes: integer -- range size
+
+    :return: string -- way it was copied e.g.: reflink
+    """
+    target.flush()
+    devices = (os.fstat(source.fileno()).st_dev, os.fstat(target.fileno()).st_dev)
+    target_start = target.tell()
+    for (way, copy) in ways:
+        if (way, devices) in unsupported: continue
+        try:
+            if not copy(source, target, offset, n_bytes): continue
+        except (IOError, OSError) as e:
+            if e.errno not in fallback_errnos: raise
+            with lock: unsupported.add((way, devices))
+            target.seek(target_start)
+            target.truncate()
+            continue
+        if way != 'shutil': target.seek(target_start + n_bytes)
+        with lock: stats[way] += 1
+        return way
+
+def copy_file(source_file, target_file):
+    """
+    Copy a file from /path1/file_x.ext to /path2/file_y.ext
+
+    Arguments:
+    :param source_file: string e.g.: /path1/file_x.ext
+    :param target_file: string e.g.: /path2/file_y.ext
+
+    :return: string -- way it was copied e.g.: reflink
+    """
+    if os.path.exists(target_file) and os.path.samefile(source_file, target_file):
+        raise shutil.Error("%s and %s are the same file." %(source_file, target_file))
+    with open(source_file, 'rb') as source:
+        with open(target_file, 'wb') as target:
+            return copy_range(source, target, 0, os.fstat(source.fileno()).st_size)
+
+def get_stats_text():
+    """
+    Get a summary of the ways files were copied e.g.: 10 reflink, 2 shutil
+
+    :return: string
+    """
+    return ', '.join("%i %s" %(stats[way], way) for (way, copy) in ways if stats[way])
@@ -0,0 +1,118 @@
+"""
+Audio fingerprint :: fingerprint
+
+Fingerprint of a tune: a digest of its MPEG audio data, the bytes between
+its ID3v2 and ID3v1 tags (see tunewriter.get_audio_region). Tags are not
+digested, so the same rip tagged on different ways (or on different
+folders) has the same fingerprint.
+
+Audio data is read on fixed-size chunks, so memory does not depend on
+tune size. Fingerprints are kept on the scan index, if any, so a tune is
+only read again when it changes.
+
+Tunes are registered by fingerprint along the run (and across runs, on
+the scan index) once they were written, so a tune whose audio data was
+already seen is found as a duplicate.
+
+Fingerprints are taken when folders are scanned, not while tunes are
+written, as a tune has to be found as a duplicate before it is written
+(or skipped). On runs with a scan index, unchanged tunes are not read
+again to get them.
+"""
+
+import hashlib
+
+import tunewriter
+
+chunk_size = 1024*1024
+
+def get_digest(f, offset, n_bytes):
+    """
+    Get the digest of a range of bytes of a file, read on chunks.
+
+    Arguments:
+    :param f: file object -- opened on binary mode
+    :param offset: integer -- position where range starts
+    :param n_bytes: integer -- range size
+
+    :return: string -- hexadecimal digest
+    """
+    digest = hashlib.sha1()
+    f.seek(offset)
+    while n_bytes > 0:
+        data = f.read(min(chunk_size, n_bytes))
+        if not data: break
+        digest.update(data)
+        n_bytes -= len(data)
+    return digest.hexdigest()
+
+def get_fingerprint(mp3_file):
+    """
+    Get the fingerprint of a mp3 file.
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+
+    :return: string -- hexadecimal digest, None if file is not supported or it was not read.
+    """
+    try:
+        with open(mp3_file, 'rb') as f:
+            region = tunewriter.get_audio_region(f)
+            if region is None: return None
+            (start, end, file_size) = region
+            return get_digest(f, start, end - start)
+    except (IOError, OSError):
+        return None
+
+class Fingerprints:
+
+    def __init__(self, scan_index=None):
+        """
+        Arguments:
+        :param scan_index: ScanIndex object -- tunes are registered across runs on it, if any.
+        """
+        self.scan_index = scan_index
+        self.paths = {}
+
+
+    def find(self, fingerprint, mp3_file):
+        """
+        Find the tune which was registered with a fingerprint, if it is not the same file.
+        Tunes registered on the scan index on former runs are only trusted if they still exist
+        and they did not change (e.g.: moved, deleted or re-encoded), otherwise they are unregistered.
+
+        Arguments:
+        :param fingerprint: string
+        :param mp3_file: string e.g.: /path/to/file/file.mp3
+
+        :return: string -- path of the tune registered, None if there is none
+        """
+        path = self.paths.get(fingerprint)
+        while path is None and self.scan_index is not None:
+            path = self.scan_index.get_fingerprint_path(fingerprint)
+            if path is None: break
+            if self.scan_index.get(path, 'fingerprint')[0] != fingerprint:
+                self.scan_index.delete_fingerprint(path)
+                path = None
+        if path is None or path == self.get_key(mp3_file): return None
+        return path
+
+
+    def add(self, fingerprint, mp3_file, save=True):
+        """
+        Register a tune by its fingerprint, unless a tune was already registered with it.
+
+        Arguments:
+        :param fingerprint: string
+        :param mp3_file: string e.g.: /path/to/file/file.mp3
+        :param save: boolean -- tune is also registered on the scan index, if any (across runs)
+        """
+        if self.find(fingerprint, mp3_file) is not None: return
+        self.paths[fingerprint] = self.get_key(mp3_file)
+        if save and self.scan_index is not None: self.scan_index.put_fingerprint(mp3_file, fingerprint)
+
+
+    def get_key(self, mp3_file):
+        """Get the key a tune is registered by (see ScanIndex.get_key)."""
+        if self.scan_index is not None: return self.scan_index.get_key(mp3_file)
+        return mp3_file
@@ -0,0 +1,126 @@
+"""
+Frame reader :: framereader
+
+Read the basic ID3 data of a mp3 file without loading its whole ID3 tag.
+
+Tags often hold large frames (e.g.: 1-2 MB attached pictures, lyrics)
+which are not needed to get basic ID3 data. ID3v2 frame headers are
+walked and only the text frames basic ID3 data is read from are loaded;
+the rest of frames are skipped. The whole tag is only loaded later on,
+when it is edited or saved (see Id3Gw).
+
+Audio stream info can be read from the same open file, right after the
+ID3v2 tag, so a tune is opened once to get both (see tunereader).
+
+Loaded frames (and the ID3v1 tag, if any) are parsed by mutagen itself,
+so values are exactly the ones a whole tag load gets (e.g.: TCON genres,
+ID3v2.3 TYER/TDAT/TIME into TDRC). Unusual tags (ID3v2.2, unsynchronised
+tags, extended headers, ...) are not read, then whole tags are loaded.
+"""
+
+import io
+import struct
+
+from mutagen.id3 import ID3, ID3NoHeaderError
+from mutagen.mp3 import MPEGInfo
+
+# Text frames basic ID3 data is read from. ID3v2.3 date frames are translated into TDRC.
+text_frames = frozenset(('TRCK', 'TALB', 'TPE1', 'TPE2', 'TIT2', 'TCON', 'TDRC', 'TCMP', 'TYER', 'TDAT', 'TIME', 'TRDA'))
+
+# Max size of a text frame, bigger ones are not expected.
+max_text_frame_size = 64*1024
+
+# ID3v1 tag and the bytes before it mutagen looks for (see mutagen find_id3v1).
+trailer_size = 128 + 3
+
+class Tag:
+
+    def __init__(self, id3, size, info=None):
+        """
+        Arguments:
+        :param id3: mutagen ID3 object -- text frames only
+        :param size: integer -- ID3v2 tag size, header included
+        :param info: mutagen MPEGInfo object -- audio stream info, if it was read
+        """
+        self.id3 = id3
+        self.size = size
+        self.info = info
+
+def get_synchsafe(data):
+    """Get an integer from a synchsafe integer (7 bits per byte). None if it is not synchsafe."""
+    if any(ord(byte) & 0x80 for byte in data): return None
+    return reduce(lambda value, byte: (value << 7) | ord(byte), data, 0)
+
+def read_frames(f):
+    """
+    Read the text frames of an ID3v2 tag, frames which are not needed are skipped.
+
+    Arguments:
+    :param f: file object -- opened on binary mode, at position 0
+
+    :return: tuple -- (tag header, loaded frames data, tag size) -- None if tag is unusual.
+                      Header is empty if there is no tag.
+    """
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != 'ID3': return ('', '', 0)
+
+    (major, flags) = (ord(header[3]), ord(header[5]))
+    tag_size = get_synchsafe(header[6:10])
+    if major not in (3, 4) or flags & 0xc0 or tag_size is None: return None
+
+    (loaded, position, end) = ([], 10, 10 + tag_size)
+    while position + 10 <= end:
+        frame_header = f.read(10)
+        frame_id = frame_header[:4]
+        if len(frame_header) < 10 or frame_id == '\x00'*4: break
+        if not frame_id.isalnum() or frame_id.upper() != frame_id: return None
+
+        size = get_synchsafe(frame_header[4:8]) if major == 4 else struct.unpack('>I', frame_header[4:8])[0]
+        if size is None or position + 10 + size > end: return None
+
+        if frame_id in text_frames:
+            if size > max_text_frame_size: return None
+            data = f.read(size)
+            if len(data) < size: return None
+            loaded.append(frame_header + data)
+        else:
+            f.seek(size, 1)
+        position += 10 + size
+
+    if flags & 0x10: end += 10
+    return (header, ''.join(loaded), end)
+
+def read_tag(mp3_file, info=False):
+    """
+    Read the basic ID3 data of a mp3 file (see module).
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+    :param info: boolean -- audio stream info is also read, from the same open file
+
+    :return: Tag object -- None if tag is unusual, so the whole tag has to be loaded.
+    """
+    with open(mp3_file, 'rb') as f:
+        read = read_frames(f)
+        if read is None: return None
+        (header, data, size) = read
+
+        f.seek(0, 2)
+        file_size = f.tell()
+        if file_size < size + trailer_size: return None
+        f.seek(-trailer_size, 2)
+        trailer = f.read(trailer_size)
+        stream_info = MPEGInfo(f, size) if info else None
+
+    tag = ''
+    if data:
+        length = len(data)
+        tag = header[:5] + '\x00' + ''.join(chr((length >> shift) & 0x7f) for shift in (21, 14, 7, 0)) + data
+
+    try:
+        id3 = ID3(io.BytesIO(tag + trailer))
+    except ID3NoHeaderError:
+        id3 = ID3()
+    except Exception:
+        return None
+    return Tag(id3, size, stream_info)
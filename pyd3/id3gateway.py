@@ -7,19 +7,104 @@ Abstract Mutagen layer for ID3 data management.
 import os
 import sys
 import mimetypes
+import threading
 
 from mutagen.id3 import ID3, TRCK, TALB, TPE1, TPE2, TIT2, TCON, TDRC, COMM, TCMP, APIC
 
-stdout_encoding = sys.stdout.encoding
+try: from mutagen._tags import PaddingInfo
+except ImportError: PaddingInfo = None
+
+import framereader
+
+stdout_encoding = sys.stdout.encoding or 'utf-8'
+
+# Frames basic ID3 data (see Id3Gw.get_id3) is read from.
+value_frames = ('TRCK', 'TALB', 'TPE1', 'TPE2', 'TIT2', 'TCON', 'TDRC', 'TCMP')
+
+# Basic ID3 data memo hits and misses (see Id3Gw.get_id3), counted from every scanning thread.
+cache_stats = {'hits': 0, 'misses': 0}
+cache_stats_lock = threading.Lock()
+
+def get_unicode(value):
+    """
+    Get a unicode value from a value prompted on terminal.
+
+    Arguments:
+    :param value: string / unicode
+
+    :return: unicode
+    """
+    return value if isinstance(value, unicode) else value.decode(stdout_encoding)
+
+def get_values_id3(id3):
+    """
+    Get a copy of ID3 data which only holds the frames basic ID3 data is read from.
+
+    Arguments:
+    :param id3: mutagen ID3 object
+
+    :return: mutagen ID3 object
+    """
+    values_id3 = ID3()
+    for frame in id3.values():
+        if frame.FrameID in value_frames: values_id3.add(frame)
+    return values_id3
 
 class Id3Gw():
 
     f = ''
-    id3 = None
+    values = None
+    original_values = None
+    listener = None
+    pending = None
+    loaded = False
 
-    def __init__(self, f):
+    def __init__(self, f, id3=None, values=None, deferred=False):
+        """
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.mp3
+        :param id3: mutagen ID3 object -- already parsed ID3 of f, if any
+        :param values: dictionary -- basic ID3 data of f (see get_id3), if any.
+                                     ID3 of f is not parsed until it is needed.
+        :param deferred: boolean -- keep only the frames basic ID3 data is read from. Frames added are
+                                    kept as pending, and they are added into the whole ID3 data when it
+                                    is loaded to be saved (see load and release). So a big folder of tunes
+                                    does not hold every attached picture, lyrics, ... until it is processed.
+        """
         self.f = f
-        self.id3 = self.open(f)
+        self.values = values
+        self.original_values = dict(values) if values is not None else None
+        if deferred:
+            self.pending = []
+            if id3 is not None: self.id3 = get_values_id3(id3)
+        elif id3 is not None or values is None:
+            self.id3 = id3 if id3 is not None else self.open(f)
+            self.loaded = True
+
+
+    def __getattr__(self, name):
+        """Open ID3 data of the file the first time it is needed (only its basic frames, if ID3 is deferred)."""
+        if name != 'id3': raise AttributeError(name)
+        if self.pending is None:
+            (self.id3, self.loaded) = (self.open(self.f), True)
+        else:
+            tag = framereader.read_tag(self.f)
+            self.id3 = tag.id3 if tag is not None else get_values_id3(self.open(self.f))
+        return self.id3
+
+
+    def load(self):
+        """Load whole ID3 data of a deferred ID3, pending frames are added into it."""
+        if self.pending is None or self.loaded: return
+        id3 = self.open(self.f)
+        for frame in self.pending: id3.add(frame)
+        (self.id3, self.loaded) = (id3, True)
+
+
+    def release(self):
+        """Release whole ID3 data of a deferred ID3, only the frames basic ID3 data is read from are kept."""
+        if self.pending is None or not self.loaded: return
+        (self.id3, self.loaded) = (get_values_id3(self.id3), False)
 
 
     def open(self, f):
@@ -37,24 +122,95 @@ class Id3Gw():
 
     def delete(self):
         """Delete ID3 data."""
+        self.keep_original_values()
+        self.load()
         self.id3.delete()
+        if self.pending is not None: self.pending = []
+        self.set_changed()
+
+
+    def add_frame(self, frame):
+        """
+        Add a frame into ID3 data. Basic ID3 data memo is dropped if frame is one of its frames.
 
+        Arguments:
+        :param frame: mutagen frame object e.g.: TALB
+
+        :return: mutagen add result
+        """
+        if self.pending is not None and not self.loaded: self.pending.append(frame)
+        if frame.FrameID not in value_frames: return self.id3.add(frame)
+        self.keep_original_values()
+        result = self.id3.add(frame)
+        self.set_changed()
+        return result
+
+
+    def set_changed(self):
+        """Drop basic ID3 data memo and tell the listener, if any, basic ID3 data changed (see summary module)."""
+        self.values = None
+        if self.listener is not None: self.listener(self)
+
+
+    def keep_original_values(self):
+        """Keep basic ID3 data as it was before the first change."""
+        if self.original_values is None: self.original_values = self.get_id3()
+
+
+    def get_id3_changes(self):
+        """
+        Get basic ID3 data changes.
+
+        :return: dictionary -- [original value, current value] for each changed tag
+        """
+        if self.original_values is None: return {}
+        values = self.get_id3()
+        return dict((tag, [self.original_values.get(tag, u''), value])
+            for (tag, value) in values.iteritems() if value != self.original_values.get(tag, u''))
 
-    def save(self, f=''):
-        """Save ID3 data."""
+
+    def save(self, f='', padding=None):
+        """
+        Save ID3 data.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.mp3 -- file of the ID3 data by default
+        :param padding: integer -- bytes of padding reserved when ID3 data does not fit on the file tag anymore.
+                                   When it fits, tag keeps its size and audio data is not moved.
+                                   Mutagen default padding is used if it is not set (or mutagen is older than 1.30).
+        """
         if not f: f = self.f
+        self.load()
+        options = {'v1': 2}
+        if padding is not None and PaddingInfo is not None:
+            options['padding'] = lambda info: info.padding if info.padding >= 0 else padding
         try:
-            self.id3.save(filename=f, v1=2)
+            self.id3.save(filename=f, **options)
         except:
-            raise Exception ("Except error: ID3 from file %s was NOT saved." %(os.basename(self.f)))
+            raise Exception ("Except error: ID3 from file %s was NOT saved." %(os.path.basename(self.f)))
 
 
     def get_id3(self):
         """
-        Get basic ID3 data.
+        Get basic ID3 data. It is memoized until a frame it is read from changes.
 
         :return: dictionary with basic ID3 data such as trackn, album, artist, title, genre, year, comment, band, compilation.
         """
+        if self.values is not None:
+            with cache_stats_lock: cache_stats['hits'] += 1
+            return dict(self.values)
+
+        with cache_stats_lock: cache_stats['misses'] += 1
+        self.values = self.read_id3()
+        return dict(self.values)
+
+
+    def read_id3(self):
+        """
+        Read basic ID3 data from ID3 frames.
+
+        :return: dictionary (see get_id3)
+        """
         return {
             'trackn': self.get_trackn(),
             'album': self.get_album(),
@@ -89,7 +245,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TRCK(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TRCK(encoding=3, text=get_unicode(value)))
 
 
     def set_album(self, value):
@@ -99,7 +255,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TALB(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TALB(encoding=3, text=get_unicode(value)))
 
 
     def set_artist(self, value):
@@ -109,7 +265,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TPE1(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TPE1(encoding=3, text=get_unicode(value)))
 
 
     def set_band(self, value):
@@ -121,7 +277,7 @@ class Id3Gw():
         """
         if value is "VA":
             self.set_compilation("1")
-        self.id3.add(TPE2(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TPE2(encoding=3, text=get_unicode(value)))
 
 
 
@@ -132,7 +288,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TCMP(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TCMP(encoding=3, text=get_unicode(value)))
 
 
     def set_title(self, value):
@@ -142,7 +298,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TIT2(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TIT2(encoding=3, text=get_unicode(value)))
 
 
     def set_genre(self, value):
@@ -152,7 +308,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TCON(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TCON(encoding=3, text=get_unicode(value)))
 
 
     def set_year(self, value):
@@ -162,7 +318,7 @@ class Id3Gw():
         Arguments:
         :param value: string -- value to set on mutagen object
         """
-        self.id3.add(TDRC(encoding=3, text=value.decode(stdout_encoding)))
+        self.add_frame(TDRC(encoding=3, text=get_unicode(value)))
 
 
     def set_comment(self, text):
@@ -176,10 +332,10 @@ class Id3Gw():
         """
         text = 'Add PyD3 into your life.'
         desc = 'PyD3'
-        self.id3.add(COMM(encoding=3, text=value.decode(stdout_encoding)), desc=desc)
+        self.add_frame(COMM(encoding=3, text=get_unicode(value)), desc=desc)
 
 
-    def set_picture(self, f, type, encoding=3):
+    def set_picture(self, f, type, encoding=3, picture=None):
         """
         APIC image
 
@@ -196,15 +352,19 @@ class Id3Gw():
                                     The metadata can also contain images of the following types:
                                     cover (front) = 3, cover (back) = 4, Media (e.g. label side of CD) = 6, ....
         :param encoding : integer -- encoding type
+        :param picture  : tuple   -- (mime, data) of the image, already read (see apiccache module).
+                                    Otherwise image file is read.
 
         :return: mutagen APIC object
         """
-        return self.id3.add(
+        if picture is None: picture = (mimetypes.guess_type(f)[0], open(f, 'rb').read())
+        (mime, data) = picture
+        return self.add_frame(
             APIC(encoding = encoding,
-                mime    = mimetypes.guess_type(f)[0],
+                mime    = mime,
                 type    = type,
                 desc    = str(type),
-                data    = open(f).read()
+                data    = data
             )
         )
 
@@ -0,0 +1,143 @@
+"""
+Image prober :: imgprobe
+
+Get the format and dimensions of an image reading only its headers: JPEG,
+PNG, GIF and BMP. Other formats are detected by imghdr on the same header
+bytes, without dimensions.
+
+Opening an image with PIL (or running imghdr on a file) for every check
+and every screen redraw is not needed: PIL is only used when an image is
+converted. Probes are memoized by file path and modification time.
+"""
+
+import io
+import os
+import struct
+import imghdr
+import mimetypes
+import threading
+
+header_size = 32
+
+# JPEG start of frame markers, they hold image dimensions.
+jpeg_sof_markers = set(range(0xC0, 0xD0)) - set((0xC4, 0xC8, 0xCC))
+
+# Max JPEG segments walked until a start of frame marker is found.
+jpeg_max_segments = 64
+
+max_probes = 4096
+
+# MIME types of probed formats.
+mime_types = {'jpeg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'bmp': 'image/bmp',
+    'tiff': 'image/tiff', 'webp': 'image/webp', 'rast': 'image/x-cmu-raster', 'rgb': 'image/x-rgb', 'exr': 'image/x-exr'}
+
+probes = {}
+lock = threading.Lock()
+
+def probe_jpeg(f):
+    """Get JPEG dimensions walking segment headers until a start of frame."""
+    f.seek(2)
+    for i in range(jpeg_max_segments):
+        marker = f.read(2)
+        while marker[:1] == '\xff' and marker[1:] == '\xff': marker = marker[1:] + f.read(1)
+        if len(marker) < 2 or marker[0] != '\xff': return None
+        code = ord(marker[1])
+        if code == 0xD8 or 0xD0 <= code <= 0xD7 or code == 0x01: continue
+        if code == 0xD9 or code == 0xDA: return None
+        length = f.read(2)
+        if len(length) < 2: return None
+        if code in jpeg_sof_markers:
+            frame = f.read(5)
+            if len(frame) < 5: return None
+            (height, width) = struct.unpack('>HH', frame[1:5])
+            return (width, height)
+        f.seek(struct.unpack('>H', length)[0] - 2, 1)
+    return None
+
+def probe_png(header):
+    """Get PNG dimensions from IHDR chunk."""
+    if header[12:16] != 'IHDR': return None
+    return struct.unpack('>II', header[16:24])
+
+def probe_gif(header):
+    """Get GIF dimensions from logical screen descriptor."""
+    return struct.unpack('<HH', header[6:10])
+
+def probe_bmp(header):
+    """Get BMP dimensions from DIB header (OS/2 and Windows ones)."""
+    dib_size = struct.unpack('<I', header[14:18])[0]
+    if dib_size == 12: return struct.unpack('<HH', header[18:22])
+    if dib_size < 40: return None
+    (width, height) = struct.unpack('<ii', header[18:26])
+    return (abs(width), abs(height))
+
+def probe(f):
+    """
+    Get the format and dimensions of an image.
+
+    Arguments:
+    :param f: file object -- opened on binary mode
+
+    :return: tuple -- (format e.g.: jpeg, width, height) -- width and height are None if they are unknown.
+                      None if it is not an image.
+    """
+    header = f.read(header_size)
+    try:
+        if header[:3] == '\xff\xd8\xff': (image_format, size) = ('jpeg', probe_jpeg(f))
+        elif header[:8] == '\x89PNG\r\n\x1a\n': (image_format, size) = ('png', probe_png(header))
+        elif header[:6] in ('GIF87a', 'GIF89a'): (image_format, size) = ('gif', probe_gif(header))
+        elif header[:2] == 'BM' and len(header) >= 26: (image_format, size) = ('bmp', probe_bmp(header))
+        else: (image_format, size) = (imghdr.what(None, h=header), None)
+    except struct.error:
+        (image_format, size) = (imghdr.what(None, h=header), None)
+    if image_format is None: return None
+    return (image_format,) + (size or (None, None))
+
+def get_mime(image_format):
+    """
+    Get the MIME type of an image format (as probed, imghdr names). imghdr names are not always MIME subtypes
+    (e.g.: rast, pbm), those are guessed from their usual extension.
+
+    Arguments:
+    :param image_format: string e.g.: jpeg
+
+    :return: string e.g.: image/jpeg -- None if it is unknown
+    """
+    if image_format in mime_types: return mime_types[image_format]
+    return mimetypes.guess_type("image.%s" %(image_format))[0]
+
+def probe_data(data):
+    """
+    Get the format and dimensions of image data (see probe).
+
+    Arguments:
+    :param data: string -- image data
+
+    :return: tuple -- (format, width, height) -- None if it is not an image.
+    """
+    return probe(io.BytesIO(data))
+
+def probe_file(image_file, st=None):
+    """
+    Get the format and dimensions of an image file (see probe). Probes are memoized by path and modification time.
+
+    Arguments:
+    :param image_file: string e.g.: /path/image_file.ext
+    :param st: os.stat result -- image file stat, if it is already known
+
+    :return: tuple -- (format, width, height) -- None if it is not an image (or it is not a file).
+    """
+    try:
+        if st is None: st = os.stat(image_file)
+        key = (image_file, st.st_mtime, st.st_size)
+        with lock:
+            if key in probes: return probes[key]
+        with open(image_file, 'rb') as f:
+            result = probe(f)
+    except (IOError, OSError):
+        return None
+
+    with lock:
+        if len(probes) >= max_probes: probes.clear()
+        probes[key] = result
+    return result
@@ -0,0 +1,128 @@
+"""
+Run journal :: journal
+
+Journal of a library run, so a run which dies (crash, power cut, Ctrl-C)
+is resumed instead of started again.
+
+A journal is an append-only JSON Lines file, one line per event, each
+line synced to disk before going ahead:
+
+{"event": "folder", "entry": {...}}  -- folder decision: a plan entry (see plan module),
+                                        target path, target filenames and ID3 tags changes.
+{"event": "file", "target": "/music/library/pyd3/Artist - Album/01_Artist_-_Title.mp3"}
+{"event": "finish", "source_path": "/music/library/folder"}
+{"event": "skip", "source_path": "/music/library/folder"}
+
+On a resumed run, finished and skipped folders are not walked again, and
+folders with a decision are completed following it, without prompting.
+A last line which was half written is ignored.
+"""
+
+import os
+import json
+
+class Journal:
+
+    def __init__(self, journal_file):
+        """
+        Arguments:
+        :param journal_file: string e.g.: /path/to/journal.jsonl
+        """
+        self.journal_file = journal_file
+        self.decisions = {}
+        self.closed_paths = set()
+        self.done = set()
+        is_whole = True
+        if os.path.exists(journal_file): is_whole = self.read()
+        self.f = open(journal_file, 'a')
+        if not is_whole: self.f.write('\n')
+
+
+    def read(self):
+        """
+        Read the events of a journal.
+
+        :return: boolean -- False if last line was half written.
+        """
+        line = '\n'
+        with open(self.journal_file) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event['event'] == 'folder':
+                    self.decisions[event['entry']['source_path']] = event['entry']
+                elif event['event'] == 'file':
+                    self.done.add(event['target'])
+                else:
+                    self.closed_paths.add(event['source_path'])
+        return line.endswith('\n')
+
+
+    def write(self, event):
+        """Append an event, synced to disk."""
+        self.f.write(json.dumps(event) + '\n')
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+
+    def is_closed(self, source_path):
+        """
+        Check if a folder was finished or skipped.
+
+        :return: boolean
+        """
+        return source_path in self.closed_paths
+
+
+    def get_decision(self, source_path):
+        """
+        Get the decision of a folder which was not finished.
+
+        :return: dictionary -- plan entry, None if there is no decision
+        """
+        if self.is_closed(source_path): return None
+        return self.decisions.get(source_path)
+
+
+    def add_decision(self, entry):
+        """
+        Add the decision of a folder.
+
+        Arguments:
+        :param entry: dictionary -- plan entry (see pyd3.get_plan_entry)
+        """
+        self.write({'event': 'folder', 'entry': entry})
+        self.decisions[entry['source_path']] = entry
+
+
+    def finish(self, source_path):
+        """Set a folder as finished."""
+        self.write({'event': 'finish', 'source_path': source_path})
+        self.closed_paths.add(source_path)
+
+
+    def skip(self, source_path):
+        """Set a folder as skipped."""
+        self.write({'event': 'skip', 'source_path': source_path})
+        self.closed_paths.add(source_path)
+
+
+    def __contains__(self, target_file):
+        return target_file in self.done
+
+
+    def add(self, target_file):
+        """
+        Set a target file as written (same as plan.DoneLog).
+
+        Arguments:
+        :param target_file: unicode e.g.: /music/target/path/directory/file.mp3
+        """
+        self.write({'event': 'file', 'target': target_file})
+        self.done.add(target_file)
+
+
+    def close(self):
+        self.f.close()
@@ -0,0 +1,77 @@
+"""
+Target layout :: layout
+
+Layouts of the target tree. Flat layout puts every album directory right
+under the target path; with tens of thousands of albums, listing, mkdir
+and lookups on a single directory get slow (e.g.: on NFS targets).
+Sharded layouts spread album directories on subdirectories:
+
+    flat    -- Artist - Album
+    letter  -- A/Artist/Artist - Album (album directories with no artist, e.g.: VA albums, under their letter: A/Album)
+    hash    -- 3f/Artist - Album (256 buckets, by the digest of the album directory)
+
+Shards are computed from the album directory name alone, the final one
+(e.g.: prompted or disambiguated), not from ID3 data. So a flat tree is
+moved into a sharded layout later on (see pyd3_layout.py) just by name,
+and each album lands on the same path a run on that layout gives it.
+"""
+
+import os
+import hashlib
+
+from unicoder import unicoder
+
+layouts = ('flat', 'letter', 'hash')
+
+# Hexadecimal digits of hash buckets, e.g.: 2 -- 256 buckets.
+hash_digits = 2
+
+def get_letter(name):
+    """
+    Get the letter shard of a name: its first letter, upper case. # if it does not start with a letter.
+
+    :return: string
+    """
+    letter = unicoder(name)[:1].upper()
+    return letter if letter.isalpha() else '#'
+
+def get_artist(target_dir):
+    """
+    Get the artist part of an album directory name: what goes before its first separator.
+
+    :return: string -- e.g.: Artist for Artist - Album, empty if there is no separator
+    """
+    (artist, separator, album) = target_dir.partition(' - ')
+    return artist.strip() if separator else ''
+
+def get_shard_dir(layout, target_dir):
+    """
+    Get the shard directory of an album directory.
+
+    Arguments:
+    :param layout: string -- flat, letter or hash
+    :param target_dir: string -- album directory name, e.g.: Artist - Album
+
+    :return: string -- relative path e.g.: A/Artist -- empty for flat layout
+    """
+    if layout == 'letter':
+        artist = get_artist(target_dir)
+        if artist: return os.path.join(get_letter(artist), artist)
+        return get_letter(target_dir)
+    if layout == 'hash':
+        name = target_dir.lower()
+        if isinstance(name, unicode): name = name.encode('utf-8')
+        return hashlib.sha1(name).hexdigest()[:hash_digits]
+    return ''
+
+def get_layout_target_dir(layout, target_dir):
+    """
+    Get the relative path of an album directory on a layout.
+
+    Arguments:
+    :param layout: string -- flat, letter or hash
+    :param target_dir: string -- album directory name, e.g.: Artist - Album
+
+    :return: string -- e.g.: Artist - Album, A/Artist/Artist - Album, 3f/Artist - Album
+    """
+    return os.path.join(get_shard_dir(layout, target_dir), target_dir)
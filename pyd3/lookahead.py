@@ -0,0 +1,97 @@
+"""
+Look ahead :: lookahead
+
+Scan next folders on a background thread while current folder is being
+edited, so next folder data is ready as soon as it is needed.
+
+Look ahead is bounded by a number of folders and by a budget (e.g.: the
+number of tunes held). A folder whose estimated weight (e.g.: its number
+of mp3 files) does not fit on the budget is not scanned ahead, it is
+scanned when it is its turn. When a scanned folder does not fit on the
+budget anyway, its scanned data is evicted -- it is the farthest folder
+from the one being edited -- and it will be scanned again.
+"""
+
+import sys
+import threading
+from collections import deque
+
+class LookAhead:
+
+    def __init__(self, items, scan, depth=2, budget=1000, estimate=None):
+        """
+        Start scanning items on a background thread.
+
+        Arguments:
+        :param items: iterable -- items to scan e.g.: os.walk folders
+        :param scan: function -- scan(item) returns a tuple (scanned data, weight)
+        :param depth: integer -- max number of items scanned ahead
+        :param budget: integer -- max weight of scanned data held ahead
+        :param estimate: function -- estimate(item) returns the weight item is expected to have once scanned, if any
+        """
+        self.items  = items
+        self.scan   = scan
+        self.depth  = depth
+        self.budget = budget
+        self.estimate = estimate
+
+        self.queue   = deque()
+        self.weight  = 0
+        self.evicted = 0
+        self.done    = False
+        self.error   = None
+
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+
+    def run(self):
+        """Scan items ahead (background thread)."""
+        try:
+            for item in self.items:
+                with self.condition:
+                    while len(self.queue) >= self.depth:
+                        self.condition.wait()
+                    has_budget = self.weight < self.budget
+                    if has_budget and self.queue and self.estimate is not None:
+                        has_budget = self.weight + self.estimate(item) <= self.budget
+
+                (data, weight) = self.scan(item) if has_budget else (None, 0)
+
+                with self.condition:
+                    if data is not None and self.queue and self.weight + weight > self.budget:
+                        (data, weight) = (None, 0)
+                        self.evicted += 1
+                    self.queue.append((item, data, weight))
+                    self.weight += weight
+                    self.condition.notify_all()
+        except Exception:
+            self.error = sys.exc_info()
+        finally:
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+
+    def __iter__(self):
+        """
+        Get scanned items, on the same order as items were given.
+        Evicted items are scanned now, on the calling thread.
+
+        :return: generator -- tuple (item, scanned data) for each item
+        """
+        while 1:
+            with self.condition:
+                while not self.queue and not self.done:
+                    self.condition.wait()
+                if not self.queue:
+                    if self.error is not None: raise self.error[0], self.error[1], self.error[2]
+                    return
+                (item, data, weight) = self.queue.popleft()
+                self.weight -= weight
+                self.condition.notify_all()
+
+            if data is None: (data, weight) = self.scan(item)
+            yield (item, data)
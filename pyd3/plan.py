@@ -0,0 +1,126 @@
+"""
+Plan :: plan
+
+Plan manifest of a music library: what PyD3 would do with each folder,
+computed without touching the target tree, to be applied later on.
+
+A manifest is a JSON Lines file. First line holds the settings the
+folders were planned with, which are not kept on the folder entries
+(e.g.: conversion of attached images, see pyd3.CoverConverter):
+
+{"settings": {"cover": {"max_size": 500, "image_format": "jpeg", "max_bytes": 0, "cache_dir": null}}}
+
+Next lines, one line per folder:
+
+{
+    "source_path": "/music/library/folder",
+    "target_path": "/music/library/pyd3/Artist - Album",
+    "tunes": [{"source": "/music/library/folder/01.mp3", "target": "01_Artist_-_Title.mp3",
+               "tags": {"title": ["old title", "new title"]}}],
+    "apic_images": {"apic_9": {"file": "/music/library/folder/cover.jpg", "apictype": 3}},
+    "extra_files": [{"source": "/music/library/folder/cover.jpg", "target": "cover.jpg"}]
+}
+
+Operations which were applied are written on a done log, next to the
+manifest, so applying a manifest again skips them.
+"""
+
+import os
+import json
+from collections import OrderedDict
+
+class PlanWriter:
+
+    def __init__(self, manifest_file, settings=None):
+        """
+        Arguments:
+        :param manifest_file: string e.g.: /path/to/plan.jsonl
+        :param settings: dictionary -- settings the folders are planned with
+        """
+        self.manifest_file = manifest_file
+        self.f = open(manifest_file, 'w')
+        self.f.write(json.dumps({'settings': settings or {}}) + '\n')
+
+
+    def add(self, entry):
+        """
+        Add a folder entry into the manifest.
+
+        Arguments:
+        :param entry: dictionary
+        """
+        self.f.write(json.dumps(entry) + '\n')
+
+
+    def close(self):
+        self.f.close()
+
+
+def read_plan(manifest_file):
+    """
+    Read a manifest, grouping its folder entries by target path.
+
+    Arguments:
+    :param manifest_file: string e.g.: /path/to/plan.jsonl
+
+    :return: ordered dictionary -- list of folder entries for each target path
+    """
+    groups = OrderedDict()
+    with open(manifest_file) as f:
+        for line in f:
+            if not line.strip(): continue
+            entry = json.loads(line)
+            if 'settings' in entry: continue
+            groups.setdefault(entry['target_path'], []).append(entry)
+    return groups
+
+
+def read_plan_settings(manifest_file):
+    """
+    Read the settings a manifest was planned with.
+
+    Arguments:
+    :param manifest_file: string e.g.: /path/to/plan.jsonl
+
+    :return: dictionary -- empty if manifest has no settings
+    """
+    with open(manifest_file) as f:
+        line = f.readline()
+    try:
+        return json.loads(line).get('settings', {})
+    except ValueError:
+        return {}
+
+
+class DoneLog:
+
+    def __init__(self, log_file):
+        """
+        Arguments:
+        :param log_file: string e.g.: /path/to/plan.jsonl.done -- one target file per line
+        """
+        self.done = set()
+        if os.path.exists(log_file):
+            with open(log_file) as f:
+                self.done = set(line.rstrip('\n').decode('utf-8') for line in f)
+        self.f = open(log_file, 'a')
+
+
+    def __contains__(self, target_file):
+        return target_file in self.done
+
+
+    def add(self, target_file):
+        """
+        Set a target file as done.
+
+        Arguments:
+        :param target_file: unicode e.g.: /music/target/path/directory/file.mp3
+        """
+        self.f.write(target_file.encode('utf-8') + '\n')
+        self.f.flush()
+        self.done.add(target_file)
+
+
+    def close(self):
+        self.f.close()
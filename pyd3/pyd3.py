@@ -1,8 +1,12 @@
 import os
+import io
 import sys
 import mimetypes
-import imghdr
+import fnmatch
 import textwrap
+import hashlib
+import tempfile
+from collections import Counter
 
 from PIL import Image as pil
 
@@ -13,6 +17,17 @@ import dragger
 #import id3gateway as id3g
 import audiogateway as audiog
 from id3gateway import Id3Gw
+from tunereader import read_tunes, map_on_pool
+import tunewriter
+import copier
+from apiccache import ApicCache
+from summary import FolderSummary
+from statcache import StatCache
+from targetindex import TargetIndex
+import layout
+from tune import Tune
+import imgprobe
+import fingerprint
 
 
 class Utils:
@@ -46,14 +61,14 @@ class Utils:
     
     def get_file_size(self, file):
         """
-        Get file size from a filename path into a human readable format.
+        Get file size from a filename path into a human readable format (see stat cache).
         
         Arguments:
         :param file: string e.g.: /path/to/file/file.ext
         
         :return: string
         """
-        return self.get_bytes_converter(os.path.getsize(file))
+        return self.get_bytes_converter(self.stat_cache.get_size(file))
     
     
     def get_dir_size(self, the_path, tree=False):
@@ -62,6 +77,7 @@ class Utils:
 
         Also, it can return the total size of the directory --with its directiores 
         and files on a recursive mode--. See optional "tree" param.
+        Directory files are stated once (see stat cache), but on recursive mode.
         
         Arguments:
         :param the_path: string e.g.: /path/to/get/its/size/
@@ -69,6 +85,7 @@ class Utils:
         
         :return: string
         """
+        if tree is False: return self.get_bytes_converter(self.stat_cache.get_dir_size(the_path))
         path_size = 0
         for path, dirs, files in os.walk(the_path):
             for file in files:
@@ -133,18 +150,35 @@ class Audio:
         
         :return: dictionary -- dictionary with data for each key
         """
-        audio_flattened = {}
-        for tune in tunes_data:
-            empty_tags = []
-            for key, value in tune['audio'].iteritems():
-                if not str(value):
-                    empty_tags.append(key)
-                    continue
-                if not audio_flattened.has_key(key):
-                    audio_flattened[key] = [value]
-                elif value not in audio_flattened[key] and value is not None:
-                    audio_flattened[key].append(value)
-        return audio_flattened
+        return FolderSummary(tunes_data, listen=False).get_audio_flattened()
+        
+    
+    def set_tunes_fingerprints(self, tunes):
+        """
+        Set the audio fingerprint of a bunch of tunes (see fingerprint module).
+        Fingerprints are read from scan index, if any, and the rest of them 
+        are digested -- on a pool of processes if there are several workers.
+        
+        Arguments:
+        :param tunes: list -- Tune objects
+        """
+        (to_digest, stats) = ([], {})
+        for tune in tunes:
+            if self.scan_index is not None:
+                (tune.fingerprint, stats[tune.source]) = self.scan_index.get(tune.source, 'fingerprint')
+                if tune.fingerprint is not None: continue
+            to_digest.append(tune)
+        
+        mp3_files = [tune.source for tune in to_digest]
+        if self.workers < 2 or len(mp3_files) < self.parallel_min_tunes:
+            fingerprints = [fingerprint.get_fingerprint(mp3_file) for mp3_file in mp3_files]
+        else:
+            fingerprints = map_on_pool(fingerprint.get_fingerprint, mp3_files, self.workers)
+        
+        for (tune, tune_fingerprint) in zip(to_digest, fingerprints):
+            tune.fingerprint = tune_fingerprint
+            if self.scan_index is not None and tune_fingerprint is not None and stats[tune.source] is not None:
+                self.scan_index.put(tune.source, 'fingerprint', tune_fingerprint, stats[tune.source])
 
 
 class Id3:
@@ -159,13 +193,42 @@ class Id3:
         Arguments:
         :param mp3_file: string -- mp3 file path: e.g.: /path/filename.mp3
         
-        :return: dictionary
+        :return: Tune object -- it also has dictionary access e.g.: tune['filename']['source']
         """
-        return {
-            'filename': {'source': mp3_file},
-            'audio': audiog.get_audio_tune(mp3_file),
-            'id3': Id3Gw(mp3_file)
-        }
+        return self.get_tunes_data([mp3_file])[0]
+        
+    
+    def get_tunes_data(self, mp3_files):
+        """
+        Get MP3 data for a bunch of files given (see get_tune_data).
+        Files are read from scan index, if any, and the rest of them 
+        are parsed -- on a pool of processes if there are several workers.
+        ID3 data of folders with stream_min_tunes tunes or more is deferred (see Id3Gw), 
+        so memory is bounded whatever the folder size is.
+        
+        Arguments:
+        :param mp3_files: list -- each item is like e.g.: /path/filename.mp3
+        
+        :return: list -- Tune object for each file, on the same order
+        """
+        tunes = [None]*len(mp3_files)
+        (to_read, stats) = ([], {})
+        deferred = 0 < self.stream_min_tunes <= len(mp3_files)
+        for i, mp3_file in enumerate(mp3_files):
+            if self.scan_index is not None:
+                (record, stats[i]) = self.scan_index.get(mp3_file, 'tune')
+                if record is not None:
+                    tunes[i] = (record['audio'], Id3Gw(mp3_file, values=record['id3'], deferred=deferred))
+                    continue
+            to_read.append(i)
+        
+        read = read_tunes([mp3_files[i] for i in to_read], self.workers, self.parallel_min_tunes, deferred)
+        for i, (audio, id3) in zip(to_read, read):
+            tunes[i] = (audio, id3)
+            if self.scan_index is not None:
+                self.scan_index.put(mp3_files[i], 'tune', {'audio': audio, 'id3': id3.get_id3()}, stats[i])
+        
+        return [Tune(mp3_file, audio, id3) for (mp3_file, (audio, id3)) in zip(mp3_files, tunes)]
         
     
     def get_id3_flattened(self, tunes_data):
@@ -177,20 +240,18 @@ class Id3:
         
         :return: dictionary -- dictionary with data for each key (id3 tag)
         """
-        id3_flattened = {'warnings': {}}
-        for tune in tunes_data:
-            empty_tags = []
-            for tag, value in tune['id3'].get_id3().iteritems():
-                if not value and tag is not 'band' and tag is not 'compilation':
-                    empty_tags.append(tag)
-                    continue
-                if not id3_flattened.has_key(tag):
-                    id3_flattened[tag] = [value]
-                elif value not in id3_flattened[tag] and value is not None:
-                    id3_flattened[tag].append(value)
-            if empty_tags: 
-                id3_flattened['warnings'][tune['filename']['source']] = empty_tags
-        return id3_flattened
+        return FolderSummary(tunes_data, listen=False).get_id3_flattened()
+        
+    
+    def update_flattened_data(self):
+        """
+        Update audio and ID3 summaries of the folder tunes (see get_audio_flattened and get_id3_flattened).
+        Folder summary is kept, so only tunes whose ID3 changed since last update are summarized again.
+        """
+        if self.summary is None or self.summary.tunes is not self.tunes:
+            self.summary = FolderSummary(self.tunes)
+            self.flattened_data['audio'] = self.summary.get_audio_flattened()
+        self.flattened_data['id3'] = self.summary.get_id3_flattened()
         
     
     def is_va_tunes_collection(self, tunes_data):
@@ -251,14 +312,27 @@ class Id3:
         
         :return: boolean
         """
-        id3.id3 = self.delete_id3_data(id3.id3, ('APIC', 'TCOP'))
-        for key in apic_images.keys():
-            if apic_images[key] is None: continue
-            id3.set_picture(apic_images[key]['file'], apic_images[key]['apictype'])
+        self.set_apic_data(id3, apic_images)
 
         try: id3.save(tune_file)
         except Exception, e: pass
 
+    def set_apic_data(self, id3, apic_images):
+        """
+        Replace ID3 attached images (and copyright) by the apic images given.
+        Whole ID3 data is loaded, if it is deferred (see Id3Gw.load).
+        
+        Arguments:
+        :param id3: Id3Gw object
+        :param apic_images: dictionary -- dictionary with apic image data (image file path is included)
+        """
+        id3.load()
+        id3.id3 = self.delete_id3_data(id3.id3, ('APIC', 'TCOP'))
+        for key in apic_images.keys():
+            if apic_images[key] is None: continue
+            image_file = apic_images[key]['file']
+            id3.set_picture(image_file, apic_images[key]['apictype'], picture=self.apic_cache.get(image_file))
+
     def delete_id3_data(self, id3, keys):
         """
         Delete ID3 keys.
@@ -330,27 +404,36 @@ class Image:
     
     def is_a_image(self, file):
         """
-        Check if file is a image file or not.
+        Check if file is a image file or not. Only file headers are read (see imgprobe).
         
         Arguments:
         :param file: string e.g.: /path/image_file.ext
         
         :return: boolean
         """
-        if os.path.isfile(file) and imghdr.what(file):
-            return True
-        return False
+        if self.scan_index is None:
+            return self.stat_cache.is_a_file(file) and imgprobe.probe_file(file, self.stat_cache.stat(file)) is not None
+        
+        (record, st) = self.scan_index.get(file, 'image')
+        if st is None: return False
+        if record is None:
+            record = os.path.isfile(file) and imgprobe.probe_file(file, st) is not None
+            self.scan_index.put(file, 'image', record, st)
+        return record
         
         
     def get_image_dimensions(self, img_file):
         """
-        Get image dimensions on pixels (width x height)
+        Get image dimensions on pixels (width x height). They are read from image headers (see imgprobe),
+        image is opened only if its format is not probed.
         
         Arguments:
         :param img_file: string e.g.: /path/image_file.ext
         
         :return: tuple --  (width, height)
         """
+        probe = imgprobe.probe_file(img_file, self.stat_cache.stat(img_file))
+        if probe is not None and probe[1] is not None: return probe[1:]
         return pil.open(img_file).size
         
         
@@ -410,10 +493,186 @@ class Image:
             if os.path.basename(image_file) in candidate_files:
                 return {'file':image_file, 'apictype':self.image_types['apic_9']['id']}
         return None
+
+
+# Converter of the images attached to tunes (APIC): max dimension, image format and max bytes.
+# Huge covers (e.g.: 3000x3000px PNG scans) are not embedded verbatim on every tune anymore.
+# Converted images are cached on disk by source image content hash (and conversion settings),
+# so the same cover on several albums, or on several runs, is converted just once.
+
+formats = {'jpeg': ('JPEG', 'image/jpeg', '.jpg'), 'png': ('PNG', 'image/png', '.png')}
+
+def get_cover_converter(settings):
+    """
+    Get the converter of the images attached to tunes, if images are converted.
+
+    Arguments:
+    :param settings: dictionary -- CoverConverter arguments: max_size, image_format, max_bytes and cache_dir
+
+    :return: CoverConverter object -- None if images are not converted
+    """
+    if not (settings.get('max_size') or settings.get('image_format') or settings.get('max_bytes')): return None
+    return CoverConverter(**settings)
+
+class CoverConverter:
+    
+    jpeg_qualities = (90, 80, 70, 60, 50)
+    max_shrinks = 4
+    
+    def __init__(self, max_size=0, image_format=None, max_bytes=0, cache_dir=None):
+        """
+        Arguments:
+        :param max_size: integer -- max width and height, in pixels. 0 for no limit.
+        :param image_format: string -- jpeg or png. None keeps JPEG images and turns the rest into PNG.
+        :param max_bytes: integer -- max image size, in bytes. 0 for no limit.
+        :param cache_dir: string e.g.: /path/to/cache/ -- directory where converted images are cached, if any
+        """
+        self.max_size = max_size
+        self.image_format = image_format
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir and not os.path.isdir(cache_dir): os.makedirs(cache_dir)
+    
+    
+    def __call__(self, data, mime):
+        """
+        Get an image converted, if it does not comply with the settings (see apiccache module). 
+        Images which cannot be converted (e.g.: malformed ones) are kept as they are.
+    
+        Arguments:
+        :param data: string -- image data
+        :param mime: string -- image MIME type e.g.: image/png
+    
+        :return: tuple -- (data, mime)
+        """
+        probe = imgprobe.probe_data(data)
+        if probe is not None and probe[1] is not None and self.is_compliant(probe, data): return (data, mime)
+    
+        try:
+            image = pil.open(io.BytesIO(data))
+            if self.is_compliant((image.format or '', ) + image.size, data): return (data, mime)
+    
+            image_format = self.get_image_format(image)
+            cache_file = self.get_cache_file(data, image_format)
+            if cache_file and os.path.isfile(cache_file):
+                with open(cache_file, 'rb') as f:
+                    return (f.read(), formats[image_format][1])
+    
+            converted = self.convert(image, image_format)
+        except Exception:
+            # PIL raises on malformed images not only IOError, e.g.: SyntaxError, struct.error, IndexError.
+            return (data, mime)
+    
+        if cache_file: self.cache(cache_file, converted)
+        return (converted, formats[image_format][1])
+    
     
+    def is_compliant(self, probe, data):
+        """
+        Check if an image complies with the settings.
+    
+        Arguments:
+        :param probe: tuple -- (format e.g.: jpeg, width, height) (see imgprobe)
+        :param data: string -- image data
+    
+        :return: boolean
+        """
+        (image_format, width, height) = probe
+        if self.max_size and max(width, height) > self.max_size: return False
+        if self.max_bytes and len(data) > self.max_bytes: return False
+        if self.image_format and image_format.lower() != self.image_format: return False
+        return True
+    
+    
+    def get_image_format(self, image):
+        """
+        Get the format an image is converted into.
+    
+        :return: string -- jpeg or png
+        """
+        if self.image_format: return self.image_format
+        return 'jpeg' if image.format == 'JPEG' else 'png'
+    
+    
+    def get_cache_file(self, data, image_format):
+        """
+        Get the cache file of a converted image, if images are cached.
+    
+        :return: string e.g.: /path/to/cache/hash.jpg -- None if images are not cached
+        """
+        if not self.cache_dir: return None
+        key = hashlib.sha1(data)
+        key.update("%s-%s-%s" %(self.max_size, image_format, self.max_bytes))
+        return os.path.join(self.cache_dir, key.hexdigest() + formats[image_format][2])
+    
+    
+    def cache(self, cache_file, data):
+        """
+        Write a converted image on the cache. It is written on a temporary file of the cache
+        directory and then renamed, so a cache file is never read half written
+        (e.g.: by another run sharing the cache). Images which cannot be cached are just not cached.
+    
+        Arguments:
+        :param cache_file: string e.g.: /path/to/cache/hash.jpg
+        :param data: string -- converted image data
+        """
+        tmp_file = None
+        try:
+            (fd, tmp_file) = tempfile.mkstemp(prefix='.', suffix='.pyd3-part', dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(tmp_file, cache_file)
+        except (IOError, OSError):
+            if tmp_file and os.path.exists(tmp_file): os.remove(tmp_file)
+    
+    
+    def convert(self, image, image_format):
+        """
+        Convert an image: it is resized to max size and saved on the format given.
+        JPEG quality is lowered, and then image is shrunk, until it fits on max bytes.
+    
+        :return: string -- converted image data
+        """
+        if image_format == 'jpeg' and image.mode != 'RGB': image = image.convert('RGB')
+        if self.max_size: image.thumbnail((self.max_size, self.max_size), pil.ANTIALIAS)
+    
+        for shrink in range(self.max_shrinks + 1):
+            for quality in (self.jpeg_qualities if image_format == 'jpeg' else (None,)):
+                data = self.save(image, image_format, quality)
+                if not self.max_bytes or len(data) <= self.max_bytes: return data
+            (width, height) = image.size
+            image = image.resize((max(1, width*3/4), max(1, height*3/4)), pil.ANTIALIAS)
+        return data
+    
+    
+    def save(self, image, image_format, quality=None):
+        """
+        Get image data on the format given.
+    
+        :return: string
+        """
+        f = io.BytesIO()
+        options = {'optimize': True}
+        if quality: options['quality'] = quality
+        image.save(f, formats[image_format][0], **options)
+        return f.getvalue()
+
 
 class Filename:
     
+    def get_apic_image_target_filename(self, key, image_file):
+        """
+        Get the filename of an apic image on target directory e.g.: cover.jpg
+        
+        Arguments:
+        :param key: string -- image type key e.g.: apic_9
+        :param image_file: string e.g.: /path/image_file.ext
+        
+        :return: string
+        """
+        return "%s%s" %(self.image_types[key]['filename'][0], os.path.splitext(image_file)[1])
+    
+    
     def get_trackn_max_digits(self, n_mp3_files):
         """
         Get track number max digits -- i.e.: For a set of 101 files, it will return a 3 digit integer.
@@ -465,7 +724,8 @@ class Filename:
         :return: string
         """
         filename_name, filename_ext = os.path.basename(os.path.splitext(filename)[0]), os.path.splitext(filename)[1]
-        (trackn, artist, title) = (id3.get_trackn(), id3.get_artist(), id3.get_title())
+        values = id3.get_id3()
+        (trackn, artist, title) = (values['trackn'], values['artist'], values['title'])
                 
         if trackn and artist and title:
             filename_name = "%s %s - %s" %(self.get_trackn_padded(trackn, trackn_max_digits), artist, title)
@@ -507,13 +767,64 @@ class Filename:
         :param source_file: string e.g.: /path1/file_x.ext
         :param target_file: string e.g.: /path2/file_y.ext
         
-        :return: None
+        :return: string -- way it was copied (see copier module)
         """
         import shutil
+        part_file = self.get_part_filename(target_file)
         try:
-            shutil.copyfile(source_file, target_file)
-        except (IOError, shutil.Error):
+            way = copier.copy_file(source_file, part_file)
+            self.rename_part_file(part_file, target_file)
+            return way
+        except (IOError, OSError, shutil.Error):
+            self.remove_part_file(part_file)
             raise PyD3Error("file %s was not copied." %(os.path.basename(source_file)))
+    
+    
+    def get_part_filename(self, target_file):
+        """
+        Get the file a target file is written into, before it is renamed as target file.
+        So target files are either whole or missing, even if a run dies while writing them.
+        
+        Arguments:
+        :param target_file: string e.g.: /path2/file_y.ext
+        
+        :return: string e.g.: /path2/.file_y.ext.pyd3-part
+        """
+        return os.path.join(os.path.dirname(target_file), ".%s.pyd3-part" %(os.path.basename(target_file)))
+    
+    
+    def rename_part_file(self, part_file, target_file):
+        """
+        Rename a part file as its target file, replacing it if it already exists.
+        
+        Arguments:
+        :param part_file: string e.g.: /path2/.file_y.ext.pyd3-part
+        :param target_file: string e.g.: /path2/file_y.ext
+        """
+        try:
+            os.rename(part_file, target_file)
+        except OSError:
+            if not os.path.exists(target_file): raise
+            os.remove(target_file)
+            os.rename(part_file, target_file)
+    
+    
+    def remove_part_file(self, part_file):
+        """Remove a part file which was not renamed, if any."""
+        try: os.remove(part_file)
+        except OSError: pass
+    
+    
+    def remove_part_files(self, path):
+        """
+        Remove the part files left on a directory (e.g.: by a run which died while writing them).
+        
+        Arguments:
+        :param path: string e.g.: /path2/
+        """
+        if not os.path.isdir(path): return
+        for filename in fnmatch.filter(os.listdir(path), '.*.pyd3-part'):
+            self.remove_part_file(os.path.join(path, filename))
         
         
 class Directory:
@@ -557,15 +868,27 @@ class Directory:
 
     def get_target_tune_path(self, main_target_path, target_dir):
         """
-        Get target tune path.
+        Get target tune path, on the target layout (see layout module).
         
         Arguments:
         :param main_target_path: string -- e.g.: /music/target/path/
         :param target_dir: string -- e.g.: directory
         
-        :return: string -- e.g.: /music/target/path/directory/
+        :return: string -- e.g.: /music/target/path/directory/, /music/target/path/A/Artist/directory/
+        """
+        return os.path.join(main_target_path, self.get_layout_target_dir(target_dir))
+        
+    
+    def get_layout_target_dir(self, target_dir):
+        """
+        Get the relative path of a target directory on the target layout, from the directory name alone.
+        
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+        
+        :return: string -- e.g.: directory, A/Artist/directory
         """
-        return os.path.join(main_target_path, target_dir)
+        return layout.get_layout_target_dir(self.layout, target_dir)
         
         
     def get_alternative_custom_target_dir(self, target_dir, main_target_path):
@@ -580,6 +903,8 @@ class Directory:
         
         :return:
         """
+        if self.headless: return self.get_disambiguated_target_dir(target_dir, main_target_path)
+        
         custom_target_dir = raw_input(textwrap.dedent("""\
                 Directory [%s] already exists on [%s] path. 
                 Please, provide a target file container name (AKA folder).
@@ -589,9 +914,118 @@ class Directory:
         return custom_target_dir if custom_target_dir is not "" else target_dir
         
     
+    def get_target_index(self, main_target_path):
+        """
+        Get the index of the directories of target path (see targetindex module), 
+        it is listed the first time it is needed unless it is shared (target_index option).
+        
+        Arguments:
+        :param main_target_path: string -- e.g.: /music/target/path/
+        
+        :return: TargetIndex object
+        """
+        if self.target_index is None: self.target_index = TargetIndex(main_target_path, self.layout)
+        return self.target_index
+        
+    
+    def get_free_target_dir(self, target_dir, main_target_path, prompt=True):
+        """
+        Get a target directory which is not taken on target path, and claim it. 
+        A taken directory is reused if unchanged tunes are skipped, it existed before the run 
+        and it holds tunes of the folder (see is_a_folder_target_path). 
+        Otherwise, an alternative is prompted (unless it is headless) or it is disambiguated.
+        
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+        :param main_target_path: string -- e.g.: /music/target/path/
+        :param prompt: boolean -- an alternative can be prompted
+        
+        :return: string
+        """
+        target_index = self.get_target_index(main_target_path)
+        reuse = self.get_target_dir_reuse(main_target_path)
+        is_free = lambda target_dir: target_index.is_free(target_dir, reuse)
+        while prompt and not self.headless and not is_free(target_dir):
+            custom_target_dir = self.get_alternative_custom_target_dir(target_dir, main_target_path)
+            if not custom_target_dir or custom_target_dir == target_dir: break
+            target_dir = custom_target_dir
+        if not is_free(target_dir):
+            target_dir = self.get_disambiguated_target_dir(target_dir, main_target_path)
+        target_index.claim(target_dir)
+        return target_dir
+        
+    
+    def get_disambiguated_target_dir(self, target_dir, main_target_path):
+        """
+        Get an alternative target directory, without prompting the user. It is the first one
+        which is free (see get_free_target_dir) of: directory (year), directory (source directory), directory (2), ...
+        
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+        :param main_target_path: string -- e.g.: /music/target/path/
+        
+        :return: string
+        """
+        (target_index, reuse) = (self.get_target_index(main_target_path), self.get_target_dir_reuse(main_target_path))
+        years = self.flattened_data['id3'].get('year', ())
+        suffixes = [unicode(years[0])[:4] if len(years) == 1 and years[0] else '', slugy(self.paths['source_dir'], ' ', False)]
+        for suffix in suffixes:
+            if not suffix or suffix.lower() == target_dir.lower(): continue
+            alternative_target_dir = "%s (%s)" %(target_dir, suffix)
+            if target_index.is_free(alternative_target_dir, reuse): return alternative_target_dir
+        return target_index.get_numbered_target_dir(target_dir, reuse)
+        
+    
+    def get_target_dir_reuse(self, main_target_path):
+        """
+        Get the check of the existing target directories which can be reused (see TargetIndex.is_free).
+        
+        Arguments:
+        :param main_target_path: string -- e.g.: /music/target/path/
+        
+        :return: function -- None if directories are not reused (unchanged tunes are not skipped)
+        """
+        if not self.skip_unchanged: return None
+        return lambda target_dir: self.is_a_folder_target_path(os.path.join(main_target_path, target_dir))
+        
+    
+    def is_a_folder_target_path(self, target_path):
+        """
+        Check if an existing target path holds tunes of the folder (e.g.: written by a previous run): 
+        it holds mp3 files, and the audio data size of each one is the one of a folder tune. 
+        Filenames and tags are not compared, as they might be edited since then.
+        
+        Arguments:
+        :param target_path: string -- e.g.: /music/target/path/directory/
+        
+        :return: boolean
+        """
+        try:
+            mp3_files = [os.path.join(target_path, f) for f in os.listdir(target_path) if os.path.splitext(f)[1] == '.mp3']
+            target_sizes = Counter(tunewriter.get_audio_size(f) for f in mp3_files)
+            source_sizes = self.get_source_audio_sizes()
+        except (IOError, OSError):
+            return False
+        if not mp3_files or None in target_sizes: return False
+        return not (target_sizes - source_sizes)
+        
+    
+    def get_source_audio_sizes(self):
+        """
+        Get the audio data sizes of the folder tunes (see tunewriter.get_audio_size). 
+        They are read once, not for each target path checked (see is_a_folder_target_path).
+        
+        :return: Counter -- number of tunes of each audio data size
+        """
+        sources = tuple(tune['filename']['source'] for tune in self.tunes)
+        if self.source_audio_sizes is None or self.source_audio_sizes[0] != sources:
+            self.source_audio_sizes = (sources, Counter(tunewriter.get_audio_size(f) for f in sources))
+        return self.source_audio_sizes[1]
+        
+    
     def create_dir(self, path, mode=0777):
         """
-        Creates a directory for a given path.
+        Creates a directory for a given path, and its parent directories if they are missing (e.g.: shard directories).
         
         Arguments:
         :param path: string e.g.: /path/to/somewhere/
@@ -599,7 +1033,9 @@ class Directory:
         
         :return: boolean -- True if success, False if path already exists.
         """
+        parent_path = os.path.dirname(os.path.normpath(path))
         try:
+            if not os.path.isdir(parent_path): os.makedirs(parent_path, mode)
             os.mkdir(path, mode)
         except OSError:
             return False
@@ -748,27 +1184,29 @@ class Edit:
         Capitalize id3 tag tune values
         -- List tune filenames, view and edit a specific tune. --
         """
-        option_tags = self.prompt_get_id3_tag()
-        for tag in option_tags:
-            for (i, tune) in enumerate(self.tunes, 0):
-                #print tune.get('id3').get_id3()[tag]
-                s = self.filter_title(tune.get('id3').get_id3()[tag].title())
-                search_and_replace = {
-                    'feat.': ('Featuring', 'Ft.', 'Ft', 'Feat_', 'Feat.', 'Feat',),
-                    'with': ('With', 'Wt.',)
-                }
+        self.capitalize_tags(self.prompt_get_id3_tag())
+
+
+    def capitalize_tags(self, tags):
+        """
+        Capitalize id3 tag values of all tunes.
+        
+        Arguments:
+        :param tags: list -- id3 tags e.g.: ['artist', 'title']
+        """
+        search_and_replace = {
+            'feat.': ('Featuring', 'Ft.', 'Ft', 'Feat_', 'Feat.', 'Feat',),
+            'with': ('With', 'Wt.',)
+        }
+        for tag in tags:
+            for tune in self.tunes:
+                s = self.filter_title(tune['id3'].get_id3()[tag].title())
                 for replace_with, search_tags in search_and_replace.iteritems():
                     for search_tag in search_tags:
                         if search_tag in s:
-                            """
-                            ok = raw_input("Its 'ok'? tag: %s, string: %s >> " %(replace_with, tune.get('id3').get_id3()[tag]))
-                            if (ok is 'ok'):
-                                s = s.replace(search_tag, replace_with)
-                                break
-                            """
                             s = s.replace(search_tag, replace_with)
                             break
-                        self.tunes[i]['id3'].set_id3_tag_tune(tag, s.encode('utf-8'))
+                tune['id3'].set_id3_tag_tune(tag, s)
 
 
     def filter_title(self, s):
@@ -818,6 +1256,7 @@ class Edit:
                     Note: You can just drag and drop target file into terminal. :)
                     >> """))).strip()
                 image = dragger.terminal(image)
+                self.stat_cache.invalidate(image)
                 
                 if self.is_a_image(image):
                     self.apic_images[ops[op]] = {'file':image, 'apictype':tune_image_type['id']}
@@ -847,36 +1286,464 @@ class Edit:
                     raw_input("__INVALID_OPTION__ [%s]... Press a KEY to continue. " %(v))
     
 
+class Batch:
+    
+    def apply_rules(self, rules):
+        """
+        Apply batch rules (see batch module) to the folder data, instead of prompting the menu.
+        Folder is set to be processed, or to be skipped.
+        
+        Arguments:
+        :param rules: dictionary
+        
+        :return: list -- reasons why folder needs a review. Empty if it does not need it.
+        """
+        if self.is_a_skipped_dir(rules['skip']['source_dirs']):
+            self.skip_folder_data()
+            return []
+        
+        self.capitalize_tags(rules['capitalize'])
+        
+        self.update_flattened_data()
+        self.is_a_va_album = len(self.flattened_data['id3'].get('artist', ())) >= rules['va']['min_artists']
+        
+        template = rules['va_target_dir'] if self.is_a_va_album else rules['target_dir']
+        self.paths['target_dir'] = self.get_template_target_dir(template, self.paths['source_dir'], self.flattened_data['id3'], self.is_a_va_album)
+        
+        self.set_non_expected_files_policy(rules['non_expected_files'])
+        
+        reasons = self.get_rules_violations(rules['accept'])
+        if reasons: self.skip_folder_data()
+        else: self.process_folder_data()
+        return reasons
+        
+    
+    def is_a_skipped_dir(self, patterns):
+        """
+        Check if folder directory name matches a pattern.
+        
+        Arguments:
+        :param patterns: list -- shell-style patterns e.g.: ['*sample*']
+        
+        :return: boolean
+        """
+        for pattern in patterns:
+            if fnmatch.fnmatch(self.paths['source_dir'], pattern):
+                return True
+        return False
+        
+    
+    def get_template_target_dir(self, template, directory, id3_flattened, is_a_va_album):
+        """
+        Get target tune directory from a template e.g.: "%(artist)s - %(album)s".
+        If there is no template, or a template value is empty, 
+        default target tune directory is returned (see get_target_dir).
+        
+        Arguments:
+        :param template: string
+        :param directory: string -- e.g.: directory
+        :param id3_flattened: dictionary
+        :param is_a_va_album: boolean
+        
+        :return: string
+        """
+        if template:
+            values = dict((tag, values[0]) for (tag, values) in id3_flattened.iteritems() if tag != 'warnings' and values)
+            values['source_dir'] = directory
+            try:
+                return slugy(template %(values), ' ', False)
+            except KeyError:
+                pass
+        return self.get_target_dir(directory, id3_flattened, is_a_va_album)
+        
+    
+    def set_non_expected_files_policy(self, policy):
+        """
+        Consider (or not) non expected files to be copied.
+        
+        Arguments:
+        :param policy: string / list -- "include", "exclude" or a list of extensions e.g.: [".pdf"]
+        """
+        for non_expected_file in self.non_expected_files:
+            if isinstance(policy, list):
+                extension = os.path.splitext(non_expected_file['filename'])[1].lower()
+                consider = extension in [e.lower() for e in policy]
+            else:
+                consider = policy == 'include'
+            non_expected_file['data']['consider'] = consider
+        
+    
+    def get_rules_violations(self, accept):
+        """
+        Get which accept rules folder data does not comply with.
+        
+        Arguments:
+        :param accept: dictionary -- accept rules
+        
+        :return: list
+        """
+        reasons = []
+        if len(self.tunes) < accept['min_tunes']:
+            reasons.append("There are %i tunes, %i required." %(len(self.tunes), accept['min_tunes']))
+        for (tune_file, empty_tags) in self.flattened_data['id3']['warnings'].iteritems():
+            missing_tags = [tag for tag in empty_tags if tag in accept['required_tags']]
+            if missing_tags:
+                reasons.append("ID3 tag(s) %s has not a value on %s file." %(', '.join(missing_tags), os.path.basename(tune_file)))
+        if accept['single_album'] and len(self.flattened_data['id3'].get('album', ())) > 1:
+            reasons.append("Tunes belong to several albums.")
+        if accept['require_cover'] and not self.apic_images.get('apic_9'):
+            reasons.append("There is no cover image.")
+        return reasons
+    
+
 class Process:
     
+    def run_jobs(self, function, items, get_weight, get_key=None):
+        """
+        Call a function over items, on the writer pool if there is one (see writerpool module).
+        PyD3 errors are collected per item, so an item which fails does not stop the rest of them.
+        
+        Arguments:
+        :param function: function -- function(item)
+        :param items: list
+        :param get_weight: function -- get_weight(item) returns the bytes item holds in flight
+        :param get_key: function -- get_key(item) returns the key of item, items with the same key are run in order
+        
+        :return: generator -- (item, result, PyD3Error or None) for each item, on the same order
+        """
+        if self.writer_pool is None:
+            for item in items:
+                try:
+                    yield (item, function(item), None)
+                except PyD3Error as e:
+                    yield (item, None, e)
+            return
+        for (item, result, error) in self.writer_pool.map(function, items, get_weight, get_key):
+            if error is not None and not isinstance(error, PyD3Error): raise error
+            yield (item, result, error)
+    
+    
+    def get_job_weight(self, f):
+        """Get the bytes a file holds in flight when it is written (its size)."""
+        try: return self.stat_cache.get_size(f)
+        except OSError: return 0
+    
+    
     def process_tunes(self, tunes, trackn_max_digits, target_path, apic_images):
         for tune in tunes:
             target_filename = self.get_tunned_filename(tune['filename']['source'], tune['id3'], trackn_max_digits)
             tune['filename']['target'] = os.path.abspath(os.path.join(target_path, target_filename))
-            self.copy_file(tune['filename']['source'], tune['filename']['target'])
-            self.save_id3_data(tune['filename']['target'], tune['id3'], apic_images)
-            print "[ii] tune %s was processed correctly." %(unicoder(os.path.basename(tune['filename']['source'])))
+        
+        process_tune = lambda tune: self.process_tune(tune, apic_images)
+        get_weight = lambda tune: tune.size or 0
+        get_key = lambda tune: tune['filename']['target']
+        for (tune, status, error) in self.run_jobs(process_tune, tunes, get_weight, get_key):
+            if error is not None:
+                self.report['tunes_failed'] += 1
+                print "[ee] %s" %(unicoder(error.msg))
+                continue
+            self.report['tunes_%s' %(status)] += 1
+            self.add_fingerprint(tune, tune.source)
+            if self.journal is not None: self.journal.add(tune['filename']['target'])
+            if status == 'skipped':
+                print "[ii] tune %s was not changed, it was skipped." %(unicoder(os.path.basename(tune['filename']['source'])))
+            else:
+                print "[ii] tune %s was processed correctly." %(unicoder(os.path.basename(tune['filename']['source'])))
+    
+    
+    def get_not_duplicated_tunes(self, tunes):
+        """
+        Find the tunes whose audio data was already seen on the library (see fingerprint module), 
+        or on another tune of the folder. Duplicated tunes are reported and, if duplicates are skipped, 
+        they are left out. Tunes are not registered here, but once they are written (see add_fingerprint).
+        
+        Arguments:
+        :param tunes: list -- Tune objects, with their fingerprint
+        
+        :return: list -- tunes to be processed
+        """
+        (not_duplicated_tunes, seen) = ([], {})
+        for tune in tunes:
+            duplicate = None
+            if tune.fingerprint:
+                duplicate = seen.get(tune.fingerprint) or self.fingerprints.find(tune.fingerprint, tune.source)
+            if duplicate is None:
+                if tune.fingerprint: seen[tune.fingerprint] = tune.source
+                not_duplicated_tunes.append(tune)
+                continue
+            
+            self.report['tunes_duplicated'] += 1
+            if self.dedupe == 'skip':
+                print "[ww] tune %s was skipped, it has the same audio data as %s." %(unicoder(os.path.basename(tune.source)), unicoder(duplicate))
+                continue
+            print "[ww] tune %s has the same audio data as %s." %(unicoder(os.path.basename(tune.source)), unicoder(duplicate))
+            not_duplicated_tunes.append(tune)
+        return not_duplicated_tunes
+    
+    
+    def add_fingerprint(self, tune, mp3_file, save=True):
+        """
+        Register a tune by its fingerprint, if duplicates are found (see get_not_duplicated_tunes).
+        
+        Arguments:
+        :param tune: Tune object, with its fingerprint
+        :param mp3_file: string e.g.: /path/to/file/file.mp3 -- where tune is
+        :param save: boolean -- tune is also registered across runs (see Fingerprints.add)
+        """
+        if self.fingerprints is None or not tune.fingerprint: return
+        self.fingerprints.add(tune.fingerprint, mp3_file, save)
+    
+    
+    def process_tune(self, tune, apic_images):
+        """
+        Write a tune into its target file, unless it is unchanged and unchanged tunes are skipped.
+        
+        Arguments:
+        :param tune: Tune object
+        :param apic_images: dictionary
+        
+        :return: string -- skipped, retagged (target file existed) or copied
+        """
+        try:
+            exists = os.path.exists(tune['filename']['target'])
+            if exists and self.skip_unchanged and self.is_an_unchanged_tune(tune, apic_images): return 'skipped'
+            self.write_tune(tune['filename']['source'], tune['filename']['target'], tune['id3'], apic_images)
+        except (IOError, OSError):
+            raise PyD3Error("tune %s was not processed." %(os.path.basename(tune['filename']['source'])))
+        return 'retagged' if exists else 'copied'
+    
+    
+    def is_an_unchanged_tune(self, tune, apic_images):
+        """
+        Check if tune target file already holds the tune as it would be written now (see tunewriter).
+        
+        Arguments:
+        :param tune: Tune object
+        :param apic_images: dictionary
+        
+        :return: boolean
+        """
+        self.set_apic_data(tune['id3'], apic_images)
+        unchanged = tunewriter.is_an_unchanged_tune(tune['filename']['source'], tune['filename']['target'], tune['id3'].id3)
+        if unchanged: tune['id3'].release()
+        return unchanged
+    
+    
+    def write_tune(self, source_file, target_file, id3, apic_images):
+        """
+        Write a tune into target file with its ID3 data (and apic images), in a single pass 
+        if it is possible (see tunewriter module). Otherwise, tune is copied and then its ID3 is saved.
+        Tune is written into a part file, which is renamed as target file once it is whole.
+        Whole ID3 data of a deferred ID3 is released once tune is written.
+        
+        Arguments:
+        :param source_file: string e.g.: /path1/file_x.mp3
+        :param target_file: string e.g.: /path2/file_y.mp3
+        :param id3: Id3Gw object
+        :param apic_images: dictionary
+        """
+        part_file = self.get_part_filename(target_file)
+        try:
+            self.set_apic_data(id3, apic_images)
+            if not tunewriter.write_tune(source_file, part_file, id3.id3):
+                copier.copy_file(source_file, part_file)
+                try: id3.save(part_file)
+                except Exception: pass
+            self.rename_part_file(part_file, target_file)
+        except (IOError, OSError):
+            self.remove_part_file(part_file)
+            raise PyD3Error("file %s was not copied." %(os.path.basename(source_file)))
+        finally:
+            id3.release()
+
+    
+    def retag_tunes(self, tunes, trackn_max_digits, apic_images):
+        """
+        Save ID3 data into the source tunes (in place) and rename them as their tunned filenames.
+        ID3 tags reserve id3_padding bytes when they grow, so later edits fit without moving audio data.
+        
+        Arguments:
+        :param tunes: list
+        :param trackn_max_digits: integer
+        :param apic_images: dictionary
+        """
+        for tune in tunes:
+            source_file = tune['filename']['source']
+            target_file = os.path.join(os.path.dirname(source_file), self.get_tunned_filename(source_file, tune['id3'], trackn_max_digits))
+            
+            try:
+                self.set_apic_data(tune['id3'], apic_images)
+                tag_size = tunewriter.read_id3v2_size(source_file)
+                tune['id3'].save(source_file, self.id3_padding)
+            except Exception:
+                print "[ee] ID3 from file %s was NOT saved." %(unicoder(os.path.basename(source_file)))
+                continue
+            finally:
+                tune['id3'].release()
+            moved = tag_size != tunewriter.read_id3v2_size(source_file)
+            self.report['retagged_moving_audio' if moved else 'retagged_in_place'] += 1
+            
+            tune['filename']['target'] = source_file
+            if target_file != source_file:
+                if os.path.exists(target_file):
+                    print "[ww] tune %s was not renamed, %s already exists." %(unicoder(os.path.basename(source_file)), unicoder(os.path.basename(target_file)))
+                else:
+                    try:
+                        os.rename(source_file, target_file)
+                    except OSError as e:
+                        self.report['tunes_not_renamed'] += 1
+                        print "[ee] tune %s was retagged, but it was NOT renamed as %s. %s" %(unicoder(os.path.basename(source_file)), unicoder(os.path.basename(target_file)), unicoder(e.strerror))
+                        self.add_fingerprint(tune, source_file)
+                        continue
+                    tune['filename']['target'] = target_file
+            self.add_fingerprint(tune, tune['filename']['target'])
+            print "[ii] tune %s was retagged correctly." %(unicoder(os.path.basename(source_file)))
 
     
     def process_apic_images(self, apic_images, target_path):
-        for key in apic_images.keys():
-            if apic_images[key]:
-                image_file = apic_images[key]['file']
-                try:
-                    (filename, extension)  = self.image_types[key]['filename'][0], os.path.splitext(image_file)[1]
-                    self.copy_file(image_file, os.path.join(target_path, filename+extension))
-                    print "[ii] apic image %s was copied correctly." %(unicoder(os.path.basename(filename+extension)))
-                except PyD3Error as e: 
-                    print "[ee] %s" %(unicoder(e.msg))
+        images = [(apic_images[key]['file'], os.path.join(target_path, self.get_apic_image_target_filename(key, apic_images[key]['file'])))
+            for key in apic_images.keys() if apic_images[key]]
+        for ((image_file, target_file), way, error) in self.run_jobs(self.copy_files, images, self.get_files_weight):
+            if error is not None:
+                self.report['files_failed'] += 1
+                print "[ee] %s" %(unicoder(error.msg))
+                continue
+            if self.journal is not None: self.journal.add(target_file)
+            if way == 'skipped':
+                self.report['files_skipped'] += 1
+                print "[ii] apic image %s was not changed, it was skipped." %(unicoder(os.path.basename(target_file)))
+                continue
+            print "[ii] apic image %s was copied correctly." %(unicoder(os.path.basename(target_file)))
     
     def process_non_expected_files(self, non_expected_files, target_path):
-        for non_expected_file in non_expected_files:
-            if non_expected_file['data']['consider']:
-                try: 
-                    self.copy_file(non_expected_file['data']['path'], os.path.join(target_path, non_expected_file['filename']))
-                    print "[ii] filename %s was copied correctly." %(unicoder(os.path.basename(non_expected_file['filename'])))
-                except PyD3Error as e: 
-                    print "[ee] %s" %(unicoder(e.msg))
+        files = [(non_expected_file['data']['path'], os.path.join(target_path, non_expected_file['filename']))
+            for non_expected_file in non_expected_files if non_expected_file['data']['consider']]
+        for ((source_file, target_file), way, error) in self.run_jobs(self.copy_files, files, self.get_files_weight):
+            if error is not None:
+                self.report['files_failed'] += 1
+                print "[ee] %s" %(unicoder(error.msg))
+                continue
+            if self.journal is not None: self.journal.add(target_file)
+            if way == 'skipped':
+                self.report['files_skipped'] += 1
+                print "[ii] filename %s was not changed, it was skipped." %(unicoder(os.path.basename(target_file)))
+                continue
+            print "[ii] filename %s was copied correctly." %(unicoder(os.path.basename(target_file)))
+    
+    def copy_files(self, (source_file, target_file)):
+        """
+        Copy a (source file, target file) pair (see copy_file), unless it is unchanged and unchanged files are skipped.
+        
+        :return: string -- way it was copied, skipped if it was not
+        """
+        if self.skip_unchanged and self.is_an_unchanged_file(source_file, target_file): return 'skipped'
+        return self.copy_file(source_file, target_file)
+    
+    def is_an_unchanged_file(self, source_file, target_file):
+        """
+        Check if target file already holds source file: it has the same size, and it was written after source file was modified.
+        
+        Arguments:
+        :param source_file: string e.g.: /path1/file_x.ext
+        :param target_file: string e.g.: /path2/file_y.ext
+        
+        :return: boolean
+        """
+        source = self.stat_cache.stat(source_file)
+        try: target = os.stat(target_file)
+        except OSError: return False
+        return source is not None and target.st_size == source.st_size and target.st_mtime >= source.st_mtime
+    
+    def get_files_weight(self, (source_file, target_file)):
+        """Get the bytes a (source file, target file) pair holds in flight (see get_job_weight)."""
+        return self.get_job_weight(source_file)
+    
+
+class Plan:
+    
+    def get_plan_entry(self, trackn_max_digits, target_path):
+        """
+        Get the plan entry of the folder (see plan module): 
+        target filenames, ID3 tags changes, apic images and extra files to be copied.
+        
+        Arguments:
+        :param trackn_max_digits: integer
+        :param target_path: string -- e.g.: /music/target/path/directory/
+        
+        :return: dictionary
+        """
+        tunes = [{
+            'source': tune['filename']['source'],
+            'target': self.get_tunned_filename(tune['filename']['source'], tune['id3'], trackn_max_digits),
+            'tags'  : tune['id3'].get_id3_changes()
+        } for tune in self.tunes]
+        
+        extra_files = [{'source': image['file'], 'target': self.get_apic_image_target_filename(key, image['file'])}
+            for (key, image) in self.apic_images.iteritems() if image]
+        extra_files.extend({'source': f['data']['path'], 'target': f['filename']}
+            for f in self.non_expected_files if f['data']['consider'])
+        
+        return {
+            'source_path': self.paths['source_path'],
+            'target_path': target_path,
+            'tunes': tunes,
+            'apic_images': self.apic_images,
+            'extra_files': extra_files
+        }
+        
+    
+    def apply_plan_entry(self, entry, done):
+        """
+        Apply a plan entry: copy tunes, set their ID3 data and copy extra files.
+        Files on done log are skipped, and files copied are added into it.
+        A file which fails is reported (and counted on report) and the rest of the entry is applied.
+        
+        Arguments:
+        :param entry: dictionary -- plan entry
+        :param done: DoneLog object
+        :return: integer -- number of files which failed
+        """
+        target_path = entry['target_path']
+        if not os.path.isdir(target_path) and not self.create_dir(target_path):
+            raise PyD3Error("directory %s was not created." %(target_path))
+        
+        n_failed = 0
+        for tune in entry['tunes']:
+            target_file = os.path.join(target_path, tune['target'])
+            if target_file in done: continue
+            try:
+                try:
+                    id3 = Id3Gw(tune['source'])
+                except (IOError, OSError) as e:
+                    raise PyD3Error("tune %s was not processed." %(os.path.basename(tune['source'])))
+                for (tag, (value, new_value)) in tune['tags'].iteritems():
+                    id3.set_id3_tag_tune(tag, new_value)
+                self.write_tune(tune['source'], target_file, id3, entry['apic_images'])
+            except PyD3Error as e:
+                n_failed += 1
+                self.report['tunes_failed'] += 1
+                print "[ee] %s" %(unicoder(e.msg))
+                continue
+            done.add(target_file)
+            print "[ii] tune %s was processed correctly." %(unicoder(os.path.basename(tune['source'])))
+        
+        apic_files = set(image['file'] for image in entry['apic_images'].values() if image)
+        for extra_file in entry['extra_files']:
+            target_file = os.path.join(target_path, extra_file['target'])
+            if target_file in done: continue
+            try:
+                self.copy_file(extra_file['source'], target_file)
+            except PyD3Error as e:
+                n_failed += 1
+                self.report['files_failed'] += 1
+                print "[ee] %s" %(unicoder(e.msg))
+                continue
+            done.add(target_file)
+            if extra_file['source'] in apic_files:
+                print "[ii] apic image %s was copied correctly." %(unicoder(extra_file['target']))
+            else:
+                print "[ii] filename %s was copied correctly." %(unicoder(extra_file['target']))
+        return n_failed
     
 
 class Typewriter:
@@ -899,9 +1766,12 @@ class Typewriter:
         return "%i tunes" %(len(tune_files))
     
     def get_text_tunes_audio(self, audio):
-        t2s = lambda t: ', '.join(v for v in t if v)
+        t2s = lambda t, f: ', '.join(f(v) for v in t if v is not None)
         return "Bit Rate: %s -- Sample Rate: %s -- Format: %s -- Channels: %s" %(
-            t2s(audio.get('bitrate')), t2s(audio.get('samplerate')), t2s(audio.get('format')), t2s(audio.get('mode'))
+            t2s(audio.get('bitrate', ()), audiog.get_audio_bitrate), 
+            t2s(audio.get('samplerate', ()), audiog.get_audio_samplerate), 
+            t2s(audio.get('format', ()), lambda v: audiog.get_audio_format(*v)), 
+            t2s(audio.get('mode', ()), audiog.get_audio_mode)
         )
     
     def get_text_tunes_id3(self, id3):
@@ -1009,6 +1879,9 @@ class Typewriter:
         print self.get_text_going_to_copied_in(path)
     
     def print_source_path_was(self):
+        if self.headless:
+            print "%s path was processed." %(unicoder(self.paths['source_path']))
+            return
         raw_input("%s path was processed. Please, press a key to continue." %(unicoder(self.paths['source_path'])))
     
     def print_skip_text(self):
@@ -1033,7 +1906,7 @@ class PyD3Error(Error):
         self.msg  = msg
     
 
-class PyD3(Id3, Audio, Image, Filename, Directory, Prompter, Edit, Process, Typewriter, Utils):
+class PyD3(Id3, Audio, Image, Filename, Directory, Prompter, Edit, Batch, Process, Plan, Typewriter, Utils):
     
     paths       = []
     tunes       = []
@@ -1045,6 +1918,8 @@ class PyD3(Id3, Audio, Image, Filename, Directory, Prompter, Edit, Process, Type
     dismissing_files    = ['.DS_Store', 'thumbs.db']
     
     flattened_data  = {'audio': {}, 'id3': {}}
+    summary         = None
+    stat_cache      = None
     
     is_a_va_album   = False
     
@@ -1053,7 +1928,38 @@ class PyD3(Id3, Audio, Image, Filename, Directory, Prompter, Edit, Process, Type
     
     skip_key        = '__skip__'
     
-    def __init__(self, source_path):
+    scan_index      = None
+    
+    headless        = False
+    
+    id3_padding     = None
+    apic_cache      = None
+    report          = None
+    
+    workers             = 1
+    parallel_min_tunes  = 8
+    stream_min_tunes    = 0
+    
+    skip_unchanged      = False
+    source_audio_sizes  = None
+    
+    writer_pool     = None
+    journal         = None
+    
+    fingerprints    = None
+    dedupe          = None
+    
+    target_index    = None
+    layout          = 'flat'
+    
+    def __init__(self, source_path, **options):
+        for (option, value) in options.iteritems():
+            if not hasattr(self, option): raise PyD3Error("option %s is unknown." %(option))
+            setattr(self, option, value)
+        if self.report is None: self.report = Counter()
+        if self.apic_cache is None: self.apic_cache = ApicCache()
+        if self.stat_cache is None: self.stat_cache = StatCache()
+        self.flattened_data = {'audio': {}, 'id3': {}}
         self.paths = {
             'source_path': source_path,
             'source_dir' : os.path.basename(source_path), 
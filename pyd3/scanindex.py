@@ -0,0 +1,145 @@
+"""
+Scan index :: scanindex
+
+Persistent index (SQLite) of the data parsed from the files of a music
+library, so a re-scan only parses the files which changed since the
+last run.
+
+Each entry is stored by file path and kind of data (e.g.: tune, image)
+and it is invalidated when file size or file modification time change.
+Indexes of an older schema are emptied when they are opened.
+
+Tunes are also registered by their audio fingerprint (see fingerprint),
+so duplicates are found across runs.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+
+# Version of the data indexed, e.g.: 2 -- tunes audio data is raw (not formatted).
+schema = 2
+
+class ScanIndex:
+
+    def __init__(self, db_file):
+        """
+        Open (or create) a scan index.
+
+        Arguments:
+        :param db_file: string e.g.: /path/to/pyd3.index
+        """
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_file, check_same_thread=False)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != schema:
+            self.db.execute("DROP TABLE IF EXISTS files")
+            self.db.execute("PRAGMA user_version = %i" %(schema))
+        self.db.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT NOT NULL, kind TEXT NOT NULL, size INTEGER, mtime REAL, data TEXT,
+            PRIMARY KEY (path, kind))""")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS fingerprints (
+            path TEXT NOT NULL PRIMARY KEY, fingerprint TEXT NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS fingerprints_fingerprint ON fingerprints (fingerprint)")
+
+
+    def get_key(self, f):
+        """
+        Get the index key of a file path. SQLite needs unicode paths.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.ext
+
+        :return: unicode
+        """
+        if isinstance(f, unicode): return f
+        return f.decode(sys.getfilesystemencoding() or 'utf-8', 'replace')
+
+
+    def get(self, f, kind):
+        """
+        Get the data indexed for a file, if it did not change since it was indexed.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.ext
+        :param kind: string -- kind of data e.g.: tune
+
+        :return: tuple -- (data or None, os.stat result or None if file does not exist)
+        """
+        try: st = os.stat(f)
+        except OSError: return (None, None)
+
+        with self.lock:
+            row = self.db.execute("SELECT size, mtime, data FROM files WHERE path = ? AND kind = ?",
+                (self.get_key(f), kind)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime:
+            return (None, st)
+        return (json.loads(row[2]), st)
+
+
+    def put(self, f, kind, data, st=None):
+        """
+        Index data of a file.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.ext
+        :param kind: string -- kind of data e.g.: tune
+        :param data: json serializable data
+        :param st: os.stat result taken before data was parsed -- otherwise file is stat now
+        """
+        if st is None: st = os.stat(f)
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO files (path, kind, size, mtime, data) VALUES (?, ?, ?, ?, ?)",
+                (self.get_key(f), kind, st.st_size, st.st_mtime, json.dumps(data)))
+
+
+    def get_fingerprint_path(self, fingerprint):
+        """
+        Get the tune which was registered with a fingerprint.
+
+        Arguments:
+        :param fingerprint: string -- hexadecimal digest
+
+        :return: unicode e.g.: /path/to/file/file.mp3 -- None if there is none
+        """
+        with self.lock:
+            row = self.db.execute("SELECT path FROM fingerprints WHERE fingerprint = ? ORDER BY rowid LIMIT 1",
+                (fingerprint,)).fetchone()
+        return row[0] if row is not None else None
+
+
+    def put_fingerprint(self, f, fingerprint):
+        """
+        Register a tune by its fingerprint.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.mp3
+        :param fingerprint: string -- hexadecimal digest
+        """
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO fingerprints (path, fingerprint) VALUES (?, ?)",
+                (self.get_key(f), fingerprint))
+
+
+    def delete_fingerprint(self, f):
+        """
+        Unregister a tune from its fingerprint.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.mp3
+        """
+        with self.lock:
+            self.db.execute("DELETE FROM fingerprints WHERE path = ?", (self.get_key(f),))
+
+
+    def commit(self):
+        """Commit indexed data into disk."""
+        with self.lock:
+            self.db.commit()
+
+
+    def close(self):
+        """Commit and close scan index."""
+        self.commit()
+        self.db.close()
@@ -0,0 +1,110 @@
+"""
+Stat cache :: statcache
+
+File stats of a folder, taken once from its listing and shared by every
+screen redraw: directory size, attached image sizes, image checks, ...
+On a network share each stat is a round trip, so a menu refresh should not
+stat the whole folder again.
+
+Files added or changed meanwhile (e.g.: a new cover image) must be
+invalidated explicitly.
+"""
+
+import os
+import stat
+import errno
+import threading
+
+class StatCache:
+
+    def __init__(self):
+        self.stats = {}
+        self.dirs = {}
+        self.lock = threading.Lock()
+
+
+    def fill(self, path, files, stats=None):
+        """
+        Stat the files of a directory listing.
+
+        Arguments:
+        :param path: string e.g.: /path/to/folder
+        :param files: list -- files of the folder e.g.: /path/to/folder/file.ext
+        :param stats: dictionary -- os.stat result of files already stated, if any (see walker)
+        """
+        for f in files:
+            if stats is not None and f in stats:
+                with self.lock: self.stats[f] = stats[f]
+            else:
+                self.stat(f)
+        with self.lock: self.dirs[path] = tuple(files)
+
+
+    def stat(self, f):
+        """
+        Get the stat of a file.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.ext
+
+        :return: os.stat result -- None if file does not exist
+        """
+        with self.lock:
+            if f in self.stats: return self.stats[f]
+        try: st = os.stat(f)
+        except OSError: st = None
+        with self.lock: self.stats[f] = st
+        return st
+
+
+    def is_a_file(self, f):
+        """
+        Check if a path is a regular file.
+
+        :return: boolean
+        """
+        st = self.stat(f)
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+
+    def get_size(self, f):
+        """
+        Get the size of a file, in bytes.
+
+        :return: integer
+        """
+        st = self.stat(f)
+        if st is None: raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), f)
+        return st.st_size
+
+
+    def get_dir_size(self, path):
+        """
+        Get the size of the files of a directory (not of its subdirectories), in bytes.
+
+        Arguments:
+        :param path: string e.g.: /path/to/folder
+
+        :return: integer
+        """
+        if path not in self.dirs:
+            names = os.listdir(path) if os.path.isdir(path) else []
+            self.fill(path, [os.path.join(path, name) for name in names])
+        return sum(self.stats[f].st_size for f in self.dirs[path]
+            if self.stats.get(f) is not None and stat.S_ISREG(self.stats[f].st_mode))
+
+
+    def invalidate(self, f=None):
+        """
+        Drop the stat of a file (and the listing of its directory), or everything.
+
+        Arguments:
+        :param f: string e.g.: /path/to/file/file.ext -- None to drop everything
+        """
+        with self.lock:
+            if f is None:
+                self.stats.clear()
+                self.dirs.clear()
+                return
+            self.stats.pop(f, None)
+            self.dirs.pop(os.path.dirname(f), None)
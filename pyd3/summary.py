@@ -0,0 +1,94 @@
+"""
+Folder summary :: summary
+
+Audio and ID3 data of the tunes of a folder, flattened: the different values
+of each key, on the order they were found, and the empty ID3 tags of each tune.
+Audio values are raw (see tune module), they are formatted when displayed.
+
+Values are counted, so when a tune ID3 tag is edited only that tune is
+summarized again -- not every tune of the folder on every menu redraw.
+Tunes ID3 gateways tell the summary when they change (see Id3Gw.listener).
+"""
+
+from collections import OrderedDict
+
+# ID3 tags which might be empty, they are not warned.
+optional_tags = ('band', 'compilation')
+
+class FolderSummary:
+
+    def __init__(self, tunes, listen=True):
+        """
+        Arguments:
+        :param tunes: list -- tunes data (see PyD3.get_tunes_data)
+        :param listen: boolean -- summarize again tunes whose ID3 changes
+        """
+        self.tunes = tunes
+        self.by_source = dict((tune['filename']['source'], tune) for tune in tunes)
+        self.audio = {}
+        self.id3 = {}
+        self.warnings = {}
+        self.values = {}
+        self.changed = set()
+        self.id3_flattened = None
+
+        for tune in tunes:
+            for (key, value) in tune.iter_audio():
+                if value is not None: self.count(self.audio, key, value, 1)
+            self.add(tune)
+            if listen: tune['id3'].listener = self.set_changed
+
+
+    def set_changed(self, id3):
+        """Set a tune ID3 as changed, it is summarized again on next get_id3_flattened call."""
+        self.changed.add(id3.f)
+        self.id3_flattened = None
+
+
+    def count(self, counts, key, value, n):
+        """Add n (or subtract -n) occurrences of a value of a key."""
+        values = counts.setdefault(key, OrderedDict())
+        values[value] = values.get(value, 0) + n
+        if values[value] <= 0: del values[value]
+
+
+    def add(self, tune, n=1):
+        """Add (or subtract, n=-1) the ID3 values of a tune."""
+        source = tune['filename']['source']
+        if n > 0: self.values[source] = tune['id3'].get_id3()
+        for (tag, value) in self.values[source].iteritems():
+            if value is None or (not value and tag not in optional_tags): continue
+            self.count(self.id3, tag, value, n)
+
+        if n < 0: return
+        empty_tags = [tag for (tag, value) in self.values[source].iteritems() if not value and tag not in optional_tags]
+        if empty_tags: self.warnings[source] = empty_tags
+        else: self.warnings.pop(source, None)
+
+
+    def get_audio_flattened(self):
+        """
+        Get audio data flattened.
+
+        :return: dictionary -- list of different values for each key
+        """
+        return dict((key, values.keys()) for (key, values) in self.audio.iteritems() if values)
+
+
+    def get_id3_flattened(self):
+        """
+        Get ID3 data flattened. Only tunes changed since last call are summarized again.
+
+        :return: dictionary -- list of different values for each tag, and empty tags of each file on warnings key
+        """
+        if self.changed:
+            for source in self.changed:
+                tune = self.by_source[source]
+                self.add(tune, -1)
+                self.add(tune)
+            self.changed.clear()
+
+        if self.id3_flattened is None:
+            self.id3_flattened = dict((tag, values.keys()) for (tag, values) in self.id3.iteritems() if values)
+            self.id3_flattened['warnings'] = dict(self.warnings)
+        return self.id3_flattened
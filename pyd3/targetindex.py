@@ -0,0 +1,135 @@
+"""
+Target index :: targetindex
+
+Index of the directory names of a target path: the ones which existed
+when the run started, listed once, and the ones claimed along the run
+(created or planned). Checking a name is a set lookup, not a filesystem
+probe, so a collision is solved without creating directories to find a
+free name.
+
+Directories are checked and claimed by album directory name, e.g.:
+Artist - Album, and indexed by their relative path on the target layout
+(see layout), e.g.: A/Artist/Artist - Album. Each shard directory is
+listed the first time a name is checked on it.
+
+Names are compared in lower case, so collisions are also found for case
+insensitive filesystems.
+"""
+
+import os
+
+import layout
+
+class TargetIndex:
+
+    def __init__(self, main_target_path, target_layout='flat'):
+        """
+        Arguments:
+        :param main_target_path: string -- e.g.: /music/target/path/
+        :param target_layout: string -- flat, letter or hash (see layout module)
+        """
+        self.main_target_path = main_target_path
+        self.layout = target_layout
+        self.existing = set()
+        self.listed = set()
+        self.claimed = set()
+        self.next_numbers = {}
+        self.list_dir('')
+
+
+    def list_dir(self, shard_dir):
+        """
+        Index the names of a directory of target path, once.
+
+        Arguments:
+        :param shard_dir: string -- relative path e.g.: A/Artist -- empty for target path itself
+        """
+        if self.get_key(shard_dir) in self.listed: return
+        self.listed.add(self.get_key(shard_dir))
+        path = os.path.join(self.main_target_path, shard_dir)
+        names = os.listdir(path) if os.path.isdir(path) else []
+        self.existing.update(self.get_key(os.path.join(shard_dir, name)) for name in names)
+
+
+    def get_key(self, target_dir):
+        """Get the key a directory name is indexed by."""
+        return target_dir.lower()
+
+
+    def get_layout_target_dir(self, target_dir):
+        """
+        Get the relative path of a directory name on the target layout, its shard directory listed.
+
+        :return: string -- e.g.: directory, A/Artist/directory
+        """
+        layout_target_dir = layout.get_layout_target_dir(self.layout, target_dir)
+        self.list_dir(os.path.dirname(layout_target_dir))
+        return layout_target_dir
+
+
+    def is_taken(self, target_dir):
+        """
+        Check if a directory name already exists or it was claimed.
+
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+
+        :return: boolean
+        """
+        key = self.get_key(self.get_layout_target_dir(target_dir))
+        return key in self.existing or key in self.claimed
+
+
+    def is_reusable(self, target_dir):
+        """
+        Check if a directory name existed before the run and it was not claimed yet
+        (e.g.: it holds the tunes of a previous run).
+
+        :return: boolean
+        """
+        key = self.get_key(self.get_layout_target_dir(target_dir))
+        return key in self.existing and key not in self.claimed
+
+
+    def is_free(self, target_dir, reuse=None):
+        """
+        Check if a directory name can be given.
+
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+        :param reuse: function -- reuse(layout_target_dir) checks if a directory which existed before the run
+                                  (and it was not claimed yet) can be given, if directories are reused
+
+        :return: boolean
+        """
+        if not self.is_taken(target_dir): return True
+        return reuse is not None and self.is_reusable(target_dir) and reuse(self.get_layout_target_dir(target_dir))
+
+
+    def claim(self, target_dir):
+        """
+        Claim a directory name, so it is not given again.
+
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+        """
+        self.claimed.add(self.get_key(self.get_layout_target_dir(target_dir)))
+
+
+    def get_numbered_target_dir(self, target_dir, reuse=None):
+        """
+        Get a numbered directory name which is free e.g.: directory (2)
+        Numbers go on from the last one given for the same name.
+
+        Arguments:
+        :param target_dir: string -- e.g.: directory
+        :param reuse: function -- see is_free
+
+        :return: string
+        """
+        key = self.get_key(target_dir)
+        n = self.next_numbers.get(key, 2)
+        while not self.is_free("%s (%i)" %(target_dir, n), reuse):
+            n += 1
+        self.next_numbers[key] = n + 1
+        return "%s (%i)" %(target_dir, n)
@@ -0,0 +1,87 @@
+"""
+Tune record :: tune
+
+Data of a tune: source and target files, raw audio stream info and ID3
+gateway (and audio fingerprint, if tunes are fingerprinted), on a compact
+record (no dictionary per tune).
+
+Audio values are kept as numbers -- bytes, seconds, bits per second, ...
+-- so they can be aggregated; they are formatted when they are displayed.
+
+Tunes keep the dictionary access of the former tune data dictionaries:
+tune['id3'], tune['audio'], tune['filename']['source'], ... tune['audio']
+builds a new dictionary on each access, hot paths read the slots instead
+(tune.size, tune.iter_audio()).
+"""
+
+# Raw audio fields, as audiogateway.get_audio_info gets them.
+audio_fields = ('size', 'length', 'bitrate', 'version', 'layer', 'mode', 'samplerate')
+
+class Tune(object):
+
+    __slots__ = ('source', 'target', 'id3', 'fingerprint') + audio_fields
+
+    def __init__(self, source, audio, id3):
+        """
+        Arguments:
+        :param source: string e.g.: /path/to/file/file.mp3
+        :param audio: dictionary -- raw audio fields (see audiogateway.get_audio_info)
+        :param id3: Id3Gw object
+        """
+        self.source = source
+        self.target = None
+        self.id3 = id3
+        self.fingerprint = None
+        for field in audio_fields: setattr(self, field, audio.get(field))
+
+
+    def get_audio_fields(self):
+        """
+        Get raw audio fields (e.g.: to index them).
+
+        :return: dictionary
+        """
+        return dict((field, getattr(self, field)) for field in audio_fields)
+
+
+    def get_audio(self):
+        """
+        Get audio data: size (bytes), length (seconds), bitrate (bps), format (version, layer), mode and samplerate (Hz).
+
+        :return: dictionary
+        """
+        return dict(self.iter_audio())
+
+
+    def iter_audio(self):
+        """
+        Iterate audio data (see get_audio) straight from the record slots, without building a dictionary.
+
+        :return: generator -- (key, value) tuples
+        """
+        yield ('size', self.size)
+        yield ('length', self.length)
+        yield ('bitrate', self.bitrate)
+        yield ('format', (self.version, self.layer))
+        yield ('mode', self.mode)
+        yield ('samplerate', self.samplerate)
+
+
+    def __getitem__(self, key):
+        """Dictionary access: filename (the tune itself), source, target, audio and id3."""
+        if key == 'filename': return self
+        if key == 'audio': return self.get_audio()
+        if key in ('source', 'target', 'id3'): return getattr(self, key)
+        raise KeyError(key)
+
+
+    def __setitem__(self, key, value):
+        """Dictionary access: target and id3 can be set."""
+        if key not in ('target', 'id3'): raise KeyError(key)
+        setattr(self, key, value)
+
+
+    def get(self, key, default=None):
+        try: value = self[key]
+        except KeyError: return default
+        return default if value is None else value
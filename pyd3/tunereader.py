@@ -0,0 +1,116 @@
+"""
+Tune reader :: tunereader
+
+Read a mp3 file, opening it once, to get both its audio info and its ID3
+data.
+
+Only the text frames of the ID3 tag are loaded, and audio stream info is
+read from the same open file (see framereader); the whole tag is loaded
+later on, when it is edited or saved. Unusual tags are loaded by a
+mutagen MP3 object, whose parse is shared by the audio gateway and the
+ID3 gateway.
+
+Tunes of a folder can also be read on a pool of processes. The pool is
+shared by the threads which scan folders (see lookahead), it is used by
+one of them at a time.
+"""
+
+import threading
+import multiprocessing
+
+import audiogateway as audiog
+import framereader
+from id3gateway import Id3Gw
+
+pool = None
+pool_workers = 0
+pool_lock = threading.RLock()
+
+def read_tune(mp3_file, deferred=False):
+    """
+    Read a mp3 file, opening it once (see module).
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+    :param deferred: boolean -- ID3 data is deferred (see Id3Gw)
+
+    :return: tuple -- (raw audio dictionary (see audiogateway.get_audio_info), Id3Gw object)
+    """
+    tag = framereader.read_tag(mp3_file, info=True)
+    if tag is not None:
+        values = Id3Gw(mp3_file, tag.id3).read_id3()
+        return (audiog.get_audio_info(mp3_file, info=tag.info), Id3Gw(mp3_file, values=values, deferred=deferred))
+
+    mp3 = audiog.open_mp3(mp3_file)
+    return (audiog.get_audio_info(mp3_file, mp3), Id3Gw(mp3_file, mp3.tags, deferred=deferred))
+
+def read_tune_values(mp3_file):
+    """
+    Read a mp3 file, opening it once, keeping only basic ID3 data.
+    Mutagen objects are not sent back from pool processes.
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+
+    :return: tuple -- (audio dictionary, basic ID3 data dictionary)
+    """
+    (audio, id3) = read_tune(mp3_file)
+    return (audio, id3.get_id3())
+
+def read_tunes(mp3_files, workers=1, min_tunes=8, deferred=False):
+    """
+    Read a bunch of mp3 files. Files are read on a pool of processes
+    unless there is a single worker or there are few files.
+
+    Arguments:
+    :param mp3_files: list -- each item is like e.g.: /path/to/file/file.mp3
+    :param workers: integer -- number of processes of the pool
+    :param min_tunes: integer -- minimum number of files to use the pool
+    :param deferred: boolean -- ID3 data is deferred (see Id3Gw)
+
+    :return: list -- (audio dictionary, Id3Gw object) for each file, on the same order
+    """
+    if workers < 2 or len(mp3_files) < min_tunes:
+        return [read_tune(mp3_file, deferred) for mp3_file in mp3_files]
+
+    tunes_values = map_on_pool(read_tune_values, mp3_files, workers)
+    return [(audio, Id3Gw(mp3_file, values=values, deferred=deferred)) for (mp3_file, (audio, values)) in zip(mp3_files, tunes_values)]
+
+def get_pool(workers):
+    """
+    Get the pool of processes, it is created the first time it is needed.
+    Pool lock is held while it is used (see map_on_pool).
+
+    Arguments:
+    :param workers: integer -- number of processes of the pool
+
+    :return: multiprocessing pool object
+    """
+    global pool, pool_workers
+    if pool is not None and pool_workers != workers: close_pool()
+    if pool is None:
+        (pool, pool_workers) = (multiprocessing.Pool(workers), workers)
+    return pool
+
+def map_on_pool(function, items, workers):
+    """
+    Call a function over items on the pool of processes, once no other thread is using it.
+
+    Arguments:
+    :param function: function -- function(item), a module level one
+    :param items: list
+    :param workers: integer -- number of processes of the pool
+
+    :return: list -- results, on the same order as items
+    """
+    with pool_lock:
+        return get_pool(workers).map(function, items)
+
+def close_pool():
+    """Close the pool of processes, if any."""
+    global pool, pool_workers
+    with pool_lock:
+        if pool is None: return
+        pool.close()
+        pool.join()
+        (pool, pool_workers) = (None, 0)
@@ -0,0 +1,199 @@
+"""
+Tune writer :: tunewriter
+
+Write a tagged tune into its target file in a single pass: the new ID3v2
+tag, then the audio frames of the source file, then the ID3v1 tag.
+
+Copying the source file and then saving its ID3 writes each tune up to
+twice -- mutagen moves the whole audio data when the new tag does not fit
+on the old one (e.g.: after attaching a cover).
+
+The ID3v2 tag is rendered by mutagen itself, saving it on a small stub
+file which only holds the ID3v2 tag of the source file. So the target file
+is byte to byte the same as the one written by copying and saving.
+
+Files which are not supported (ID3v2 footer, APEv2 tag, ...) are not
+written, so they can be copied and saved as usual.
+
+A tune already written can be compared against the one it would be
+written now (see is_an_unchanged_tune), so unchanged tunes are skipped.
+"""
+
+import os
+import hashlib
+import tempfile
+
+import copier
+
+from mutagen.id3 import ID3, TextFrame
+
+try: from mutagen.id3 import MakeID3v1
+except ImportError: MakeID3v1 = None
+
+try: from mutagen.id3._id3v1 import find_id3v1
+except ImportError: find_id3v1 = None
+
+try: from mutagen._tags import PaddingInfo
+except ImportError: PaddingInfo = None
+
+def get_id3v2_size(header):
+    """
+    Get ID3v2 tag size from its header.
+
+    Arguments:
+    :param header: string -- first 10 bytes of a file
+
+    :return: integer -- tag size, header included. 0 if there is no tag, None if tag has a footer.
+    """
+    if len(header) < 10 or header[:3] != 'ID3': return 0
+    if ord(header[5]) & 0x10: return None
+    return 10 + reduce(lambda size, byte: (size << 7) | (ord(byte) & 0x7f), header[6:10], 0)
+
+def read_id3v2_size(mp3_file):
+    """
+    Get ID3v2 tag size of a file (see get_id3v2_size).
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+
+    :return: integer
+    """
+    with open(mp3_file, 'rb') as f:
+        return get_id3v2_size(f.read(10))
+
+def get_audio_region(f):
+    """
+    Get where audio data of a mp3 file starts and ends, between ID3v2 and ID3v1 tags.
+
+    Arguments:
+    :param f: file object -- opened on binary mode
+
+    :return: tuple -- (start, end, file size) -- None if file is not supported
+    """
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(0)
+    start = get_id3v2_size(f.read(10))
+    if start is None or file_size - start < 256: return None
+
+    f.seek(-160, 2)
+    trailer = f.read(160)
+    if 'APETAGEX' in trailer: return None
+
+    if find_id3v1 is not None:
+        (tag, offset) = find_id3v1(f)
+        end = file_size + offset if tag is not None else file_size
+    else:
+        end = file_size - 128 if trailer[-128:-125] == 'TAG' else file_size
+    return (start, end, file_size)
+
+def get_tag_digest(id3):
+    """
+    Get a canonical digest of ID3 frames: frames are sorted by key, so it does not depend on frames order.
+    Empty text frames are not digested, as they are not saved.
+
+    Arguments:
+    :param id3: mutagen ID3 object
+
+    :return: string -- hexadecimal digest
+    """
+    digest = hashlib.sha1()
+    for key in sorted(id3.keys()):
+        frame = id3[key]
+        if isinstance(frame, TextFrame) and not unicode(frame): continue
+        digest.update(hashlib.sha1(repr(frame)).digest())
+    return digest.hexdigest()
+
+def get_audio_size(mp3_file):
+    """
+    Get audio data size of a mp3 file, between ID3v2 and ID3v1 tags.
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+
+    :return: integer -- None if file is not supported (see get_audio_region)
+    """
+    with open(mp3_file, 'rb') as f:
+        region = get_audio_region(f)
+    return region[1] - region[0] if region is not None else None
+
+def is_an_unchanged_tune(source_file, target_file, id3):
+    """
+    Check if a target file already holds a tune as it would be written now: same audio data size
+    and same ID3 frames (see get_tag_digest).
+
+    Arguments:
+    :param source_file: string e.g.: /path1/file_x.mp3
+    :param target_file: string e.g.: /path2/file_y.mp3
+    :param id3: mutagen ID3 object -- ID3 data the tune would be written with
+
+    :return: boolean
+    """
+    try:
+        audio_size = get_audio_size(target_file)
+        if audio_size is None or audio_size != get_audio_size(source_file): return False
+        return get_tag_digest(ID3(target_file)) == get_tag_digest(id3)
+    except Exception:
+        return False
+
+def render_id3v2(id3, source, start, file_size):
+    """
+    Get the ID3v2 tag mutagen would save on a copy of the source file.
+
+    Arguments:
+    :param id3: mutagen ID3 object
+    :param source: file object -- source file opened on binary mode
+    :param start: integer -- source file ID3v2 tag size
+    :param file_size: integer -- source file size
+
+    :return: string -- None if mutagen would delete the tag (there are no frames)
+    """
+    (fd, stub_file) = tempfile.mkstemp(suffix='.id3')
+    try:
+        with os.fdopen(fd, 'wb') as stub:
+            source.seek(0)
+            stub.write(source.read(start))
+            stub.write('\x00'*128)
+
+        if PaddingInfo is None:
+            id3.save(filename=stub_file, v1=0)
+        else:
+            padding = lambda info: PaddingInfo(info.padding, file_size).get_default_padding()
+            id3.save(filename=stub_file, v1=0, padding=padding)
+
+        with open(stub_file, 'rb') as stub:
+            size = get_id3v2_size(stub.read(10))
+            if not size: return None
+            stub.seek(0)
+            return stub.read(size)
+    finally:
+        os.remove(stub_file)
+
+def write_tune(source_file, target_file, id3):
+    """
+    Write a tune into target file in a single pass: ID3v2 tag, source audio data and ID3v1 tag.
+
+    Arguments:
+    :param source_file: string e.g.: /path1/file_x.mp3
+    :param target_file: string e.g.: /path2/file_y.mp3
+    :param id3: mutagen ID3 object
+
+    :return: boolean -- False if tune is not supported, then nothing was written.
+    """
+    if MakeID3v1 is None: return False
+
+    with open(source_file, 'rb') as source:
+        region = get_audio_region(source)
+        if region is None: return False
+        (start, end, file_size) = region
+
+        try:
+            tag = render_id3v2(id3, source, start, file_size)
+        except Exception:
+            return False
+
+        with open(target_file, 'wb') as target:
+            if tag is not None: target.write(tag)
+            copier.copy_range(source, target, start, end - start)
+            if tag is not None: target.write(MakeID3v1(id3))
+    return True
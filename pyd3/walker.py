@@ -0,0 +1,123 @@
+"""
+Library walker :: walker
+
+Walk a music library folder by folder, like os.walk, listing each folder
+once with scandir (os.scandir, Python 3.5+, or the scandir package) and
+falling back to listdir and stat otherwise.
+
+Files are classified on the same pass by their extension: mp3 files, image
+files and other files. No MIME type is guessed and no file is read.
+Folders and files can be filtered by shell-style patterns, and known non
+music folders (e.g.: version control, OS metadata) are pruned.
+"""
+
+import os
+import stat
+import fnmatch
+
+try: from os import scandir
+except ImportError:
+    try: from scandir import scandir
+    except ImportError: scandir = None
+
+mp3_extensions = frozenset(('.mp3',))
+image_extensions = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.bmp'))
+
+# Folders which never hold music, they are not walked.
+pruned_dirs = ('.git', '.svn', '.hg', '__MACOSX', '.AppleDouble', '@eaDir', '.Trash*', '$RECYCLE.BIN', 'System Volume Information')
+
+class Entry:
+
+    """Directory entry when scandir is not available (see os.DirEntry)."""
+
+    def __init__(self, path, name):
+        self.name = name
+        self.path = os.path.join(path, name)
+        self.lstat = os.lstat(self.path)
+
+
+    def is_symlink(self):
+        return stat.S_ISLNK(self.lstat.st_mode)
+
+
+    def is_dir(self):
+        if not self.is_symlink(): return stat.S_ISDIR(self.lstat.st_mode)
+        return os.path.isdir(self.path)
+
+
+    def stat(self):
+        return os.stat(self.path) if self.is_symlink() else self.lstat
+
+def list_dir(path):
+    """
+    List a directory.
+
+    Arguments:
+    :param path: string e.g.: /path/to/folder
+
+    :return: list -- directory entries (os.DirEntry or Entry)
+    """
+    if scandir is not None: return list(scandir(path))
+    entries = []
+    for name in os.listdir(path):
+        try: entries.append(Entry(path, name))
+        except OSError: continue
+    return entries
+
+def get_file_kind(filename):
+    """
+    Get the kind of a file by its extension: mp3 (.mp3 extension, lower case), image or other.
+
+    :return: string
+    """
+    extension = os.path.splitext(filename)[1]
+    if extension in mp3_extensions: return 'mp3'
+    if extension.lower() in image_extensions: return 'image'
+    return 'other'
+
+def matches(name, patterns):
+    """Check if a name matches a shell-style pattern."""
+    for pattern in patterns:
+        if fnmatch.fnmatch(name, pattern): return True
+    return False
+
+def walk(top, include=(), exclude=(), prune=pruned_dirs):
+    """
+    Walk a folder tree, top-down, like os.walk (symbolic links to folders are not walked).
+
+    Arguments:
+    :param top: string e.g.: /music/library/
+    :param include: list -- shell-style patterns of the filenames to list, all of them if there is none.
+    :param exclude: list -- shell-style patterns of the filenames and folder names to skip.
+    :param prune: list -- shell-style patterns of the folder names which are not walked.
+
+    :return: generator -- a tuple for each folder: (path, mp3 files, image files, other files, stats).
+                          Files are paths e.g.: /music/library/folder/file.ext -- stats are
+                          os.stat results of files, taken from directory entries.
+    """
+    folders = [top]
+    while folders:
+        path = folders.pop()
+        try:
+            entries = list_dir(path)
+        except OSError:
+            continue
+
+        (files, stats, dirs) = ({'mp3': [], 'image': [], 'other': []}, {}, [])
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink() and not matches(entry.name, prune) and not matches(entry.name, exclude):
+                    dirs.append(entry.path)
+                continue
+
+            if matches(entry.name, exclude) or (include and not matches(entry.name, include)): continue
+            files[get_file_kind(entry.name)].append(entry.path)
+            try: stats[entry.path] = entry.stat()
+            except OSError: stats[entry.path] = None
+
+        yield (path, files['mp3'], files['image'], files['other'], stats)
+        folders.extend(reversed(dirs))
@@ -0,0 +1,89 @@
+"""
+Writer pool :: writerpool
+
+Write files (tunes, images, ...) on a pool of threads, so copies to SSD
+and network targets overlap instead of waiting one for another.
+
+Bytes in flight are capped: a file is not started while files being
+written hold the cap, unless no file is being written. Results come back
+on the same order files were given, so the output of a folder keeps its
+order. Files with the same key (e.g.: same target file) are written one
+after another, on the order they were given.
+"""
+
+import threading
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+class WriterPool:
+
+    def __init__(self, threads=4, max_bytes=64*1024*1024):
+        """
+        Arguments:
+        :param threads: integer -- number of threads
+        :param max_bytes: integer -- max bytes in flight (e.g.: sum of the sizes of the files being written)
+        """
+        self.threads = threads
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.pool = ThreadPool(threads)
+
+
+    def call(self, function, item, weight, previous, done):
+        """
+        Call function over an item (pool thread), once previous item with the same key is done.
+        Events are waited for instead of pool results, as results only wake up a single waiter.
+
+        :return: tuple -- (result, exception) -- exception is None if function did not raise.
+        """
+        try:
+            if previous is not None: previous.wait()
+            return (function(item), None)
+        except Exception as e:
+            return (None, e)
+        finally:
+            if done is not None: done.set()
+            with self.condition:
+                self.in_flight -= weight
+                self.condition.notify_all()
+
+
+    def map(self, function, items, get_weight, get_key=None):
+        """
+        Call a function over items on the pool.
+
+        Arguments:
+        :param function: function -- function(item)
+        :param items: iterable
+        :param get_weight: function -- get_weight(item) returns the bytes item holds in flight
+        :param get_key: function -- get_key(item) returns the key of item, if items are keyed
+
+        :return: generator -- (item, result, exception) for each item, on the same order
+        """
+        (pending, last) = (deque(), {})
+        for item in items:
+            weight = get_weight(item)
+            with self.condition:
+                while self.in_flight and self.in_flight + weight > self.max_bytes:
+                    self.condition.wait()
+                self.in_flight += weight
+
+            (key, done) = (get_key(item), threading.Event()) if get_key is not None else (None, None)
+            result = self.pool.apply_async(self.call, (function, item, weight, last.get(key), done))
+            if key is not None: last[key] = done
+            pending.append((item, result))
+
+            while pending and pending[0][1].ready():
+                (item, result) = pending.popleft()
+                yield (item,) + result.get()
+
+        while pending:
+            (item, result) = pending.popleft()
+            yield (item,) + result.get()
+
+
+    def close(self):
+        """Close the pool, once its threads are done."""
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,48 @@
+import os
+import sys
+import argparse
+
+from pyd3.pyd3 import PyD3
+from pyd3.pyd3 import PyD3Error
+from pyd3.unicoder import unicoder
+from pyd3.plan import read_plan, read_plan_settings, DoneLog
+from pyd3 import copier
+from pyd3.apiccache import ApicCache
+from pyd3.pyd3 import get_cover_converter
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Apply a plan manifest created by pyd3_it.py --plan.")
+    parser.add_argument('plan_file', help="Plan manifest file (JSON Lines).")
+    parser.add_argument('--done-log', dest='done_log_file', default=None,
+        help="Log of the files already applied. By default, plan manifest file with .done extension.")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    if not os.path.isfile(args.plan_file):
+        sys.exit("__PLAN_FILE_NOT_FOUND__ %s" %(args.plan_file))
+
+    done = DoneLog(args.done_log_file or "%s.done" %(args.plan_file))
+    settings = read_plan_settings(args.plan_file)
+    apic_cache = ApicCache(get_cover_converter(settings.get('cover', {})))
+    n_failed = 0
+
+    for (target_path, entries) in read_plan(args.plan_file).iteritems():
+        print "Files are going to be copied in %s path." %(unicoder(target_path))
+        for entry in entries:
+            pyd3 = PyD3(entry['source_path'], headless=True, apic_cache=apic_cache)
+            try:
+                n_failed += pyd3.apply_plan_entry(entry, done)
+            except PyD3Error as e:
+                print "[ee] %s" %(unicoder(e.msg))
+
+    done.close()
+    if n_failed: print "%i file(s) were NOT applied." %(n_failed)
+    if copier.get_stats_text(): print "Copied files: %s." %(copier.get_stats_text())
+    print "PyD3 ended to apply %s plan." %(unicoder(args.plan_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,44 +1,137 @@
 import os
 import sys
+import argparse
+from collections import Counter
 
 from textwrap import dedent
 
 from pyd3.pyd3 import PyD3
 from pyd3.pyd3 import PyD3Error
 from pyd3.unicoder import unicoder
+from pyd3.scanindex import ScanIndex
+from pyd3.lookahead import LookAhead
+from pyd3.batch import load_rules, ReviewQueue
+from pyd3.plan import PlanWriter
+from pyd3.apiccache import ApicCache
+from pyd3.pyd3 import get_cover_converter
+from pyd3.writerpool import WriterPool
+from pyd3.journal import Journal
+from pyd3.fingerprint import Fingerprints
+from pyd3.targetindex import TargetIndex
+from pyd3.layout import layouts
+from pyd3 import tunereader
+from pyd3 import walker
+from pyd3 import copier
+from pyd3 import id3gateway
 
 
-try:
-    main_source_path, main_target_path = unicoder(sys.argv[1]), unicoder(sys.argv[2])
-    if not os.path.exists(main_source_path) or not os.path.exists(main_target_path): raise OSError()
-except (IndexError, OSError):
-    sys.exit(dedent("""\
-        __ARGUMENTS_REQUIRED__
-        1. __MAIN_SOURCE_PATH__ Param. Path where the music is stored. e.g.: /music/library/
-        2. __MAIN_TARGET_PATH__ Param. Path where the processed music is going to be stored. e.g.: /music/library/pyd3/
-    """))
+def get_args():
+    parser = argparse.ArgumentParser(description="PyD3 your music library (or part of it).")
+    parser.add_argument('main_source_path', nargs='?', help="Path where the music is stored.")
+    parser.add_argument('main_target_path', nargs='?', help="Path where the processed music is going to be stored.")
+    parser.add_argument('--index', dest='index_file', default=None,
+        help="Scan index file. Tunes which did not change since last run are not parsed again.")
+    parser.add_argument('--workers', type=int, default=1,
+        help="Number of processes used to parse the tunes of a folder. 1 (default) parses them serially.")
+    parser.add_argument('--look-ahead', dest='look_ahead', type=int, default=0,
+        help="Number of next folders scanned on background while a folder is edited. 0 (default) disables it.")
+    parser.add_argument('--look-ahead-tunes', dest='look_ahead_tunes', type=int, default=1000,
+        help="Max number of tunes held by the folders scanned on background.")
+    parser.add_argument('--stream-min-tunes', dest='stream_min_tunes', type=int, default=500,
+        help="Folders with this number of tunes or more are streamed: only basic ID3 data is held, edits are applied when tunes are written. 0 disables it.")
+    parser.add_argument('--include', action='append', default=[], metavar='GLOB',
+        help="Only consider files whose name matches a shell-style pattern. It can be repeated.")
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+        help="Skip files and folders whose name matches a shell-style pattern e.g.: '*sample*'. It can be repeated.")
+    parser.add_argument('--rules', dest='rules_file', default=None,
+        help="Rules file (JSON). Folders are processed on batch mode, following the rules instead of prompting the menu.")
+    parser.add_argument('--review-queue', dest='review_queue_file', default='pyd3_review.jsonl',
+        help="File where folders which do not comply with the rules are queued to be reviewed (batch mode).")
+    parser.add_argument('--in-place', dest='in_place', action='store_true',
+        help="Retag and rename tunes in place, on the source path. Target path is not needed.")
+    parser.add_argument('--padding', type=int, default=4096,
+        help="Bytes of ID3 padding reserved on in place mode when a tag grows, so later edits do not move audio data.")
+    parser.add_argument('--cover-max-size', dest='cover_max_size', type=int, default=0,
+        help="Max width and height (pixels) of the images attached to tunes. Bigger images are resized.")
+    parser.add_argument('--cover-format', dest='cover_format', choices=('jpeg', 'png'), default=None,
+        help="Format of the images attached to tunes.")
+    parser.add_argument('--cover-max-bytes', dest='cover_max_bytes', type=int, default=0,
+        help="Max size (bytes) of the images attached to tunes.")
+    parser.add_argument('--cover-cache', dest='cover_cache_dir', default=None,
+        help="Directory where converted images are cached, so they are converted once across albums and runs.")
+    parser.add_argument('--skip-unchanged', dest='skip_unchanged', action='store_true',
+        help="Reuse existing target directories, and skip the tunes whose target file already holds the same audio and ID3 data.")
+    parser.add_argument('--writers', type=int, default=1,
+        help="Number of threads which write tunes and files into target path. 1 by default (one file after another).")
+    parser.add_argument('--writers-max-mb', dest='writers_max_mb', type=int, default=64,
+        help="Max megabytes of the files being written at the same time by the writer threads. 64 by default.")
+    parser.add_argument('--journal', dest='journal_file', default=None,
+        help="Run journal file (JSON Lines). Running again with the same journal resumes an interrupted run.")
+    parser.add_argument('--dedupe', choices=('report', 'skip'), default=None,
+        help="Find tunes whose audio data was already seen on the library (across runs with --index), and report or skip them.")
+    parser.add_argument('--layout', choices=layouts, default='flat',
+        help="Layout of the target tree: flat (by default), letter (A/Artist/Artist - Album) or hash (3f/Artist - Album). See pyd3_layout.py.")
+    parser.add_argument('--plan', dest='plan_file', default=None,
+        help="Plan manifest file (JSON Lines). Folders are planned instead of processed, target path is not touched. See pyd3_apply.py.")
+    args = parser.parse_args()
+    if args.plan_file and args.in_place: parser.error("--plan and --in-place cannot be used together.")
+    return args
 
-for (path, dirs, files) in os.walk(main_source_path):
     
-    if files is None: continue
+def get_cover_settings(args):
+    """Get the settings of the converter of the images attached to tunes (see pyd3.get_cover_converter)."""
+    return {'max_size': args.cover_max_size, 'image_format': args.cover_format, 'max_bytes': args.cover_max_bytes, 'cache_dir': args.cover_cache_dir}
     
-    pyd3 = PyD3(path)
     
-    files = [os.path.join(path, f) for f in files]
-    mp3_files = [f for f in files if pyd3.is_a_mp3_file(f)]
-    pyd3.tunes = [pyd3.get_tune_data(mp3_file) for mp3_file in mp3_files]
+def scan_folder(pyd3, folder):
+    """
+    Get tunes, apic images and non expected files of a folder given by walker.
     
-    if len(pyd3.tunes) is 0: continue
+    :return: list -- mp3 files of the folder
+    """
+    (path, mp3_files, image_files, other_files, stats) = folder
+    files = mp3_files + image_files + other_files
+    pyd3.stat_cache.fill(path, files, stats)
+    pyd3.tunes = pyd3.get_tunes_data(mp3_files)
     
-    image_files = [f for f in files if f not in mp3_files and pyd3.is_a_image(f)]
+    if len(pyd3.tunes) is 0: return mp3_files
+    if pyd3.fingerprints is not None: pyd3.set_tunes_fingerprints(pyd3.tunes)
+
+    image_files = [f for f in image_files if pyd3.is_a_image(f)]
     pyd3.apic_images = pyd3.get_apic_images(image_files)
     
     pyd3.non_expected_files = pyd3.get_non_expected_files(files)
+    return mp3_files
     
+
+def scan(folder, options):
+    """
+    Scan a folder given by walker.
+
+    :return: tuple -- ((PyD3 object, mp3 files), number of tunes) -- folders to be resumed are not scanned (see resume_folder)
+    """
+    pyd3 = PyD3(folder[0], **options)
+    if is_a_resumed_folder(folder, options['journal']): return ((pyd3, folder[1]), 0)
+    mp3_files = scan_folder(pyd3, folder)
+    if options['scan_index']: options['scan_index'].commit()
+    return ((pyd3, mp3_files), len(mp3_files))
+
+
+def is_a_resumed_folder(folder, journal):
+    """Check if a folder given by walker has a decision on the journal, so it is resumed following it."""
+    return journal is not None and journal.get_decision(folder[0]) is not None
+
+
+def get_folder_estimate(folder, journal):
+    """Get the number of tunes a folder given by walker is expected to hold once it is scanned (see lookahead)."""
+    return 0 if is_a_resumed_folder(folder, journal) else len(folder[1])
+
+
+def edit_folder(pyd3, mp3_files):
+    """Prompt the menu of a folder until it is processed or skipped."""
     while pyd3.process_folder is False and pyd3.skip_folder is False:
         
-        pyd3.flattened_data['audio'] = pyd3.get_audio_flattened(pyd3.tunes)
-        pyd3.flattened_data['id3'] = pyd3.get_id3_flattened(pyd3.tunes)
+        pyd3.update_flattened_data()
         
         pyd3.is_a_va_album = True if len(pyd3.flattened_data['id3'].get('artist', ()))>1 else False
         
@@ -89,15 +182,38 @@ for (path, dirs, files) in os.walk(main_source_path):
             raw_input("__INVALID_OPTION__ [%s]... Press a KEY to continue. " %(option))
         
         if pyd3.process_folder is True and pyd3.skip_folder is False: break
-    if pyd3.process_folder is False and pyd3.skip_folder is True: continue
     
+
+def dedupe_folder(pyd3):
+    """
+    Leave the duplicated tunes of a folder out, if duplicates are found (see get_not_duplicated_tunes).
+    A folder whose tunes are all left out is skipped: neither its target path is created, nor its files are copied.
+
+    :return: boolean -- False if folder is skipped
+    """
+    if pyd3.fingerprints is None or not pyd3.tunes: return True
+    pyd3.tunes = pyd3.get_not_duplicated_tunes(pyd3.tunes)
+    if pyd3.tunes: return True
+    print "[ww] %s path was skipped, all its tunes have the same audio data as other tunes." %(unicoder(pyd3.paths['source_path']))
+    if pyd3.journal: pyd3.journal.skip(pyd3.paths['source_path'])
+    return False
+
+
+def process_folder(pyd3, mp3_files, main_target_path):
+    """Copy tunes, apic images and non expected files of a folder into its target path."""
     trackn_max_digits = pyd3.get_trackn_max_digits(len(mp3_files))
     pyd3.tunes = pyd3.set_value_attr_to_band_tag(pyd3.tunes, pyd3.get_band_tag_value_attr(pyd3.is_a_va_album))
+    if not dedupe_folder(pyd3): return
     
-    while 1:
-        pyd3.paths['target_path'] = pyd3.get_target_tune_path(main_target_path, pyd3.paths['target_dir'])
-        if pyd3.create_dir(pyd3.paths['target_path']): break
-        pyd3.paths['target_dir'] = pyd3.get_alternative_custom_target_dir(pyd3.paths['target_dir'], main_target_path)
+    pyd3.paths['target_dir'] = pyd3.get_free_target_dir(pyd3.paths['target_dir'], main_target_path)
+    pyd3.paths['target_path'] = pyd3.get_target_tune_path(main_target_path, pyd3.paths['target_dir'])
+    if pyd3.journal: pyd3.journal.add_decision(pyd3.get_plan_entry(trackn_max_digits, pyd3.paths['target_path']))
+    if not pyd3.create_dir(pyd3.paths['target_path']) and not os.path.isdir(pyd3.paths['target_path']):
+        print "[ee] directory %s was not created." %(unicoder(pyd3.paths['target_path']))
+        pyd3.print_source_path_was()
+        return
+
+    n_failed = pyd3.report['tunes_failed'] + pyd3.report['files_failed']
     
     pyd3.print_going_to_be_copied_in(pyd3.paths['target_path'])
     try:
@@ -106,6 +222,145 @@ for (path, dirs, files) in os.walk(main_source_path):
         pyd3.process_non_expected_files(pyd3.non_expected_files, pyd3.paths['target_path'])
     except PyD3Error as e:
         print "[ee] %s" %(unicoder(e.msg))
+    else:
+        if pyd3.journal and n_failed == pyd3.report['tunes_failed'] + pyd3.report['files_failed']:
+            pyd3.journal.finish(pyd3.paths['source_path'])
+    pyd3.print_source_path_was()
+
+
+def resume_folder(pyd3, entry):
+    """Complete a folder of an interrupted run following its journaled decision, without prompting."""
+    pyd3.print_going_to_be_copied_in(entry['target_path'])
+    pyd3.remove_part_files(entry['target_path'])
+    try:
+        n_failed = pyd3.apply_plan_entry(entry, pyd3.journal)
+    except PyD3Error as e:
+        print "[ee] %s" %(unicoder(e.msg))
+        return
+    if n_failed:
+        print "[ww] %s path was NOT completely resumed, %i file(s) failed." %(unicoder(entry['source_path']), n_failed)
+        return
+    pyd3.journal.finish(entry['source_path'])
+    print "%s path was resumed and processed." %(unicoder(entry['source_path']))
+
+
+def retag_folder(pyd3, mp3_files):
+    """Retag and rename the tunes of a folder in place."""
+    trackn_max_digits = pyd3.get_trackn_max_digits(len(mp3_files))
+    pyd3.tunes = pyd3.set_value_attr_to_band_tag(pyd3.tunes, pyd3.get_band_tag_value_attr(pyd3.is_a_va_album))
+    if not dedupe_folder(pyd3): return
+    pyd3.retag_tunes(pyd3.tunes, trackn_max_digits, pyd3.apic_images)
     pyd3.print_source_path_was()
 
-print "PyD3 ended to process your music library. %s" %(unicode(main_source_path))
+
+def plan_folder(pyd3, mp3_files, main_target_path, plan):
+    """Add what would be done with a folder into a plan manifest."""
+    trackn_max_digits = pyd3.get_trackn_max_digits(len(mp3_files))
+    pyd3.tunes = pyd3.set_value_attr_to_band_tag(pyd3.tunes, pyd3.get_band_tag_value_attr(pyd3.is_a_va_album))
+    if not dedupe_folder(pyd3): return
+
+    pyd3.paths['target_dir'] = pyd3.get_free_target_dir(pyd3.paths['target_dir'], main_target_path, prompt=False)
+    pyd3.paths['target_path'] = pyd3.get_target_tune_path(main_target_path, pyd3.paths['target_dir'])
+
+    plan.add(pyd3.get_plan_entry(trackn_max_digits, pyd3.paths['target_path']))
+    for tune in pyd3.tunes: pyd3.add_fingerprint(tune, tune.source, save=False)
+    print "[ii] %s path was planned into %s path." %(unicoder(pyd3.paths['source_path']), unicoder(pyd3.paths['target_path']))
+
+
+def main():
+    args = get_args()
+
+    try:
+        if args.in_place and args.main_target_path is None: args.main_target_path = args.main_source_path
+        if args.main_source_path is None or args.main_target_path is None: raise OSError()
+        main_source_path, main_target_path = unicoder(args.main_source_path), os.path.abspath(unicoder(args.main_target_path))
+        if not os.path.exists(main_source_path) or not os.path.exists(main_target_path): raise OSError()
+    except OSError:
+        sys.exit(dedent("""\
+            __ARGUMENTS_REQUIRED__
+            1. __MAIN_SOURCE_PATH__ Param. Path where the music is stored. e.g.: /music/library/
+            2. __MAIN_TARGET_PATH__ Param. Path where the processed music is going to be stored. e.g.: /music/library/pyd3/
+        """))
+
+    try:
+        rules = load_rules(args.rules_file) if args.rules_file else None
+    except (IOError, ValueError) as e:
+        sys.exit("__RULES_FILE_NOT_VALID__ %s" %(e))
+    review_queue = ReviewQueue(args.review_queue_file)
+    plan = PlanWriter(args.plan_file, {'cover': get_cover_settings(args)}) if args.plan_file else None
+
+    scan_index = ScanIndex(args.index_file) if args.index_file else None
+    report = Counter()
+    journal = Journal(args.journal_file) if args.journal_file and plan is None and not args.in_place else None
+    writer_pool = WriterPool(args.writers, args.writers_max_mb*1024*1024) if args.writers > 1 else None
+    fingerprints = Fingerprints(scan_index) if args.dedupe else None
+    target_index = TargetIndex(main_target_path, args.layout) if not args.in_place else None
+    options = {'scan_index': scan_index, 'workers': args.workers, 'stream_min_tunes': args.stream_min_tunes, 'headless': rules is not None,
+        'id3_padding': args.padding, 'report': report, 'journal': journal, 'skip_unchanged': args.skip_unchanged, 'apic_cache': ApicCache(get_cover_converter(get_cover_settings(args))),
+        'writer_pool': writer_pool, 'fingerprints': fingerprints, 'dedupe': args.dedupe, 'target_index': target_index, 'layout': args.layout}
+
+    scan_folder_data = lambda folder: scan(folder, options)
+    walk = walker.walk(main_source_path, args.include, args.exclude)
+    if journal: walk = (folder for folder in walk if not journal.is_closed(folder[0]))
+    if args.look_ahead > 0:
+        folders = LookAhead(walk, scan_folder_data, args.look_ahead, args.look_ahead_tunes, lambda folder: get_folder_estimate(folder, journal))
+    else:
+        folders = ((folder, scan_folder_data(folder)[0]) for folder in walk)
+
+    for (folder, (pyd3, mp3_files)) in folders:
+
+        if journal and journal.get_decision(pyd3.paths['source_path']):
+            resume_folder(pyd3, journal.get_decision(pyd3.paths['source_path']))
+            continue
+
+        if len(pyd3.tunes) is 0: continue
+
+        if rules is None:
+            edit_folder(pyd3, mp3_files)
+        else:
+            reasons = pyd3.apply_rules(rules)
+            if reasons:
+                review_queue.add(pyd3.paths['source_path'], reasons)
+                print "[ww] %s path was queued to be reviewed." %(unicoder(pyd3.paths['source_path']))
+        if pyd3.process_folder is False and pyd3.skip_folder is True:
+            if journal: journal.skip(pyd3.paths['source_path'])
+            continue
+
+        if plan is not None: plan_folder(pyd3, mp3_files, main_target_path, plan)
+        elif args.in_place: retag_folder(pyd3, mp3_files)
+        else: process_folder(pyd3, mp3_files, main_target_path)
+
+    tunereader.close_pool()
+    if writer_pool: writer_pool.close()
+    if copier.get_stats_text(): print "Copied files: %s." %(copier.get_stats_text())
+    if plan: plan.close()
+    if journal: journal.close()
+    if scan_index: scan_index.close()
+
+    if report['tunes_copied'] or report['tunes_retagged'] or report['tunes_skipped']:
+        print "%i tune(s) were copied, %i retagged and %i skipped (unchanged)." %(
+            report['tunes_copied'], report['tunes_retagged'], report['tunes_skipped'])
+    if report['files_skipped']:
+        print "%i file(s) were not changed, they were skipped." %(report['files_skipped'])
+    if report['tunes_duplicated']:
+        print "%i tune(s) had the same audio data as other tunes, they were %s." %(
+            report['tunes_duplicated'], 'skipped' if args.dedupe == 'skip' else 'reported')
+    if report['tunes_failed']:
+        print "%i tune(s) were NOT written." %(report['tunes_failed'])
+    if report['files_failed']:
+        print "%i file(s) were NOT copied." %(report['files_failed'])
+    if report['tunes_not_renamed']:
+        print "%i tune(s) were retagged, but NOT renamed." %(report['tunes_not_renamed'])
+    if report['retagged_in_place'] or report['retagged_moving_audio']:
+        print "%i tune(s) were retagged without moving their audio data, %i moving it." %(
+            report['retagged_in_place'], report['retagged_moving_audio'])
+    if id3gateway.cache_stats['hits']:
+        print "ID3 data was read %i time(s) and reused %i time(s)." %(
+            id3gateway.cache_stats['misses'], id3gateway.cache_stats['hits'])
+    if review_queue.n_folders:
+        print "%i folder(s) were queued to be reviewed on %s file." %(review_queue.n_folders, review_queue.queue_file)
+    print "PyD3 ended to process your music library. %s" %(unicode(main_source_path))
+
+
+if __name__ == '__main__':
+    main()
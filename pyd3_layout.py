@@ -0,0 +1,128 @@
+import os
+import sys
+import argparse
+
+from pyd3.unicoder import unicoder
+from pyd3.layout import layouts, get_shard_dir
+from pyd3.targetindex import TargetIndex
+from pyd3 import walker
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Move the album directories of a flat target tree into a sharded layout.")
+    parser.add_argument('main_target_path', help="Path where the processed music is stored, on flat layout.")
+    parser.add_argument('--layout', choices=[layout for layout in layouts if layout != 'flat'], required=True,
+        help="Sharded layout: letter (A/Artist/Artist - Album) or hash (3f/Artist - Album).")
+    parser.add_argument('--dry-run', dest='dry_run', action='store_true',
+        help="Print where album directories would be moved, without moving them.")
+    return parser.parse_args()
+
+
+def get_album_dirs(main_target_path):
+    """
+    Get the album directories right under target path: directories which hold mp3 files (shard directories do not).
+
+    :return: list -- album directory names
+    """
+    names = []
+    for name in sorted(os.listdir(main_target_path)):
+        path = os.path.join(main_target_path, name)
+        if os.path.islink(path) or not os.path.isdir(path): continue
+        if any(walker.get_file_kind(f) == 'mp3' for f in os.listdir(path)): names.append(name)
+    return names
+
+
+def get_layout_target_dir(target_index, name):
+    """
+    Get the relative path of an album directory on the layout, from its name (see layout module), and claim it.
+    Name is numbered if it is taken on the layout (e.g.: by a former move).
+
+    Arguments:
+    :param target_index: TargetIndex object -- index of target path, on the layout
+    :param name: string -- album directory name e.g.: Artist - Album
+
+    :return: string -- e.g.: A/Artist/Artist - Album
+    """
+    if target_index.is_taken(name): name = target_index.get_numbered_target_dir(name)
+    target_index.claim(name)
+    return target_index.get_layout_target_dir(name)
+
+
+def get_shard_collisions(names, target_layout):
+    """
+    Get the album directories named as a top shard directory of the layout (e.g.: an album directory
+    named A on letter layout, or 3f on hash layout). They cannot be moved while their name is needed by the shard.
+
+    Arguments:
+    :param names: list -- album directory names
+    :param target_layout: string -- letter or hash
+
+    :return: list -- album directory names
+    """
+    shard_names = set(get_shard_dir(target_layout, name).split(os.sep)[0].lower() for name in names)
+    return [name for name in names if name.lower() in shard_names]
+
+
+def get_aside_dir(name):
+    """Get the name an album directory is moved aside as, while its name is needed by a shard directory."""
+    return ".%s.pyd3-layout" %(name)
+
+
+def migrate(main_target_path, target_layout, dry_run=False):
+    """
+    Move the album directories of a flat target tree into a sharded layout.
+    Album directories named as a shard directory are moved aside first, so they are not moved into themselves.
+
+    Arguments:
+    :param main_target_path: string -- e.g.: /music/target/path/
+    :param target_layout: string -- letter or hash
+    :param dry_run: boolean -- album directories are not moved
+
+    :return: integer -- number of album directories moved
+    """
+    names = get_album_dirs(main_target_path)
+    source_paths = dict((name, os.path.join(main_target_path, name)) for name in names)
+    for name in get_shard_collisions(names, target_layout):
+        aside_path = os.path.join(main_target_path, get_aside_dir(name))
+        if dry_run:
+            print "[ww] %s is named as a shard directory, it would be moved aside first." %(unicoder(name))
+            continue
+        try:
+            os.rename(source_paths[name], aside_path)
+        except OSError as e:
+            print "[ee] %s is named as a shard directory and it was not moved aside, it was skipped. %s" %(unicoder(name), unicoder(e.strerror))
+            names.remove(name)
+            continue
+        source_paths[name] = aside_path
+
+    target_index = TargetIndex(main_target_path, target_layout)
+    n_moved = 0
+    for name in names:
+        layout_target_dir = get_layout_target_dir(target_index, name)
+        target_path = os.path.join(main_target_path, layout_target_dir)
+        if dry_run:
+            print "[ii] %s would be moved into %s path." %(unicoder(name), unicoder(target_path))
+            continue
+        try:
+            if not os.path.isdir(os.path.dirname(target_path)): os.makedirs(os.path.dirname(target_path))
+            os.rename(source_paths[name], target_path)
+        except OSError as e:
+            print "[ee] %s was not moved. %s" %(unicoder(name), unicoder(e.strerror))
+            continue
+        n_moved += 1
+        print "[ii] %s was moved into %s path." %(unicoder(name), unicoder(target_path))
+    return n_moved
+
+
+def main():
+    args = get_args()
+    main_target_path = unicoder(args.main_target_path)
+    if not os.path.isdir(main_target_path):
+        sys.exit("__MAIN_TARGET_PATH_NOT_FOUND__ %s" %(main_target_path))
+
+    n_moved = migrate(main_target_path, args.layout, args.dry_run)
+    print "PyD3 ended to move %i album directories of %s into %s layout." %(n_moved, main_target_path, args.layout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Test mp3 files :: mp3
+
+Write small mp3 files (silent MPEG-1 Layer III frames, 128 kbps, 44100 Hz)
+tagged with the ID3 frames given.
+"""
+
+from mutagen.id3 import ID3
+
+# MPEG-1 Layer III frame, 128 kbps, 44100 Hz, no padding: 417 bytes.
+frame = '\xff\xfb\x90\x00' + '\x00'*413
+
+def make_mp3(mp3_file, frames=(), n_frames=40, v1=2, v2_version=4):
+    """
+    Write a mp3 file.
+
+    Arguments:
+    :param mp3_file: string e.g.: /path/to/file/file.mp3
+    :param frames: list -- mutagen ID3 frames, no tag is written if there are none
+    :param n_frames: integer -- number of audio frames
+    :param v1: integer -- ID3v1 tag (see mutagen ID3.save)
+    :param v2_version: integer -- ID3v2 version, 3 or 4
+    """
+    with open(mp3_file, 'wb') as f:
+        f.write(frame*n_frames)
+    if not frames: return
+    id3 = ID3()
+    for id3_frame in frames: id3.add(id3_frame)
+    id3.save(mp3_file, v1=v1, v2_version=v2_version)
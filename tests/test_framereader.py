@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mutagen.id3 import ID3, TIT2, TPE1, TPE2, TALB, TRCK, TCON, TDRC, TYER, TCMP, APIC, USLT
+from mutagen.mp3 import MP3
+
+from pyd3 import framereader
+from tests.mp3 import make_mp3
+
+
+class FrameReaderTest(unittest.TestCase):
+
+    frames = [TIT2(encoding=3, text=[u'Title']), TPE1(encoding=3, text=[u'Artist']), TPE2(encoding=1, text=[u'Band']),
+        TALB(encoding=3, text=[u'Album']), TRCK(encoding=3, text=[u'3/12']), TCON(encoding=3, text=[u'(17)Rock']),
+        TCMP(encoding=3, text=[u'1']), APIC(encoding=3, mime='image/jpeg', type=3, desc=u'', data='\xff'*64*1024),
+        USLT(encoding=3, lang='eng', desc=u'', text=u'Lyrics')]
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.mp3_file = os.path.join(self.path, 'tune.mp3')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def assertSameAsFullParse(self, tag):
+        full = ID3(self.mp3_file)
+        expected = dict((key, full[key]) for key in full.keys() if key[:4] in framereader.text_frames)
+        self.assertEqual(dict((key, tag.id3[key]) for key in tag.id3.keys()), expected)
+        for key in expected: self.assertEqual(unicode(tag.id3[key]), unicode(full[key]))
+        self.assertEqual(tag.size, full.size)
+
+
+    def test_id3v24_values_are_the_full_parse_ones(self):
+        make_mp3(self.mp3_file, self.frames + [TDRC(encoding=3, text=[u'2004'])])
+        self.assertSameAsFullParse(framereader.read_tag(self.mp3_file))
+
+
+    def test_id3v23_values_are_the_full_parse_ones(self):
+        make_mp3(self.mp3_file, self.frames + [TYER(encoding=1, text=[u'2004'])], v2_version=3)
+        tag = framereader.read_tag(self.mp3_file)
+        self.assertSameAsFullParse(tag)
+        self.assertEqual(unicode(tag.id3['TDRC']), u'2004')
+
+
+    def test_id3v1_values_are_the_full_parse_ones(self):
+        make_mp3(self.mp3_file, [TIT2(encoding=3, text=[u'Title'])])
+        id3 = ID3(self.mp3_file)
+        id3.delete(self.mp3_file, delete_v1=False, delete_v2=True)
+        self.assertSameAsFullParse(framereader.read_tag(self.mp3_file))
+
+
+    def test_large_frames_are_not_loaded(self):
+        make_mp3(self.mp3_file, self.frames)
+        tag = framereader.read_tag(self.mp3_file)
+        self.assertFalse(tag.id3.getall('APIC'))
+        self.assertFalse(tag.id3.getall('USLT'))
+
+
+    def test_stream_info_is_the_full_parse_one(self):
+        make_mp3(self.mp3_file, self.frames)
+        (info, full) = (framereader.read_tag(self.mp3_file, info=True).info, MP3(self.mp3_file).info)
+        for field in ('length', 'bitrate', 'version', 'layer', 'mode', 'sample_rate'):
+            self.assertEqual(getattr(info, field), getattr(full, field))
+
+
+    def test_untagged_file_has_no_frames(self):
+        make_mp3(self.mp3_file)
+        tag = framereader.read_tag(self.mp3_file)
+        self.assertEqual((tag.id3.keys(), tag.size), ([], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mutagen.id3 import ID3, TIT2
+
+import pyd3_it
+from pyd3.journal import Journal
+from pyd3.pyd3 import PyD3
+from tests.mp3 import make_mp3
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.journal_file = os.path.join(self.path, 'pyd3.journal')
+        self.source_path = os.path.join(self.path, 'source')
+        self.target_path = os.path.join(self.path, 'target')
+        os.mkdir(self.source_path)
+        os.mkdir(self.target_path)
+        self.journal = Journal(self.journal_file)
+
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.path)
+
+
+    def reopen(self):
+        self.journal.close()
+        self.journal = Journal(self.journal_file)
+
+
+    def get_entry(self, n_tunes):
+        tunes = []
+        for i in range(1, n_tunes + 1):
+            source_file = os.path.join(self.source_path, '%02i.mp3' %(i))
+            make_mp3(source_file, [TIT2(encoding=3, text=[u'Title %i' %(i)])])
+            tunes.append({'source': source_file, 'target': '%02i_title.mp3' %(i), 'tags': {'artist': [None, u'Artist']}})
+        return {'source_path': self.source_path, 'target_path': self.target_path, 'tunes': tunes,
+            'apic_images': {}, 'extra_files': []}
+
+
+    def test_events_are_read_back(self):
+        entry = self.get_entry(1)
+        self.journal.add_decision(entry)
+        self.journal.add(os.path.join(self.target_path, '01_title.mp3'))
+        self.journal.skip(self.path)
+        self.reopen()
+        self.assertEqual(self.journal.get_decision(self.source_path), entry)
+        self.assertIn(os.path.join(self.target_path, '01_title.mp3'), self.journal)
+        self.assertTrue(self.journal.is_closed(self.path))
+        self.journal.finish(self.source_path)
+        self.reopen()
+        self.assertIsNone(self.journal.get_decision(self.source_path))
+
+
+    def test_half_written_line_is_ignored(self):
+        self.journal.skip(self.path)
+        self.journal.close()
+        with open(self.journal_file, 'a') as f: f.write('{"event": "finish", "sour')
+        self.journal = Journal(self.journal_file)
+        self.journal.finish(self.source_path)
+        self.reopen()
+        self.assertTrue(self.journal.is_closed(self.path))
+        self.assertTrue(self.journal.is_closed(self.source_path))
+
+
+    def test_resume_removes_stale_part_files(self):
+        entry = self.get_entry(2)
+        self.journal.add_decision(entry)
+        pyd3 = PyD3(self.source_path, headless=True, journal=self.journal)
+        stale_file = pyd3.get_part_filename(os.path.join(self.target_path, '02_title.mp3'))
+        with open(stale_file, 'wb') as f: f.write('half written')
+        self.reopen()
+
+        pyd3 = PyD3(self.source_path, headless=True, journal=self.journal)
+        pyd3_it.resume_folder(pyd3, self.journal.get_decision(self.source_path))
+        self.assertFalse(os.path.exists(stale_file))
+        self.assertEqual(sorted(os.listdir(self.target_path)), ['01_title.mp3', '02_title.mp3'])
+        self.assertEqual(unicode(ID3(os.path.join(self.target_path, '02_title.mp3'))['TPE1']), u'Artist')
+        self.assertTrue(self.journal.is_closed(self.source_path))
+
+
+    def test_resume_skips_files_already_written(self):
+        entry = self.get_entry(2)
+        self.journal.add_decision(entry)
+        done_file = os.path.join(self.target_path, '01_title.mp3')
+        with open(done_file, 'wb') as f: f.write('written')
+        self.journal.add(done_file)
+        self.reopen()
+
+        pyd3 = PyD3(self.source_path, headless=True, journal=self.journal)
+        pyd3_it.resume_folder(pyd3, self.journal.get_decision(self.source_path))
+        with open(done_file, 'rb') as f: self.assertEqual(f.read(), 'written')
+        self.assertTrue(os.path.isfile(os.path.join(self.target_path, '02_title.mp3')))
+
+
+if __name__ == '__main__':
+    unittest.main()
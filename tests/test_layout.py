@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pyd3_layout
+from pyd3 import layout as target_layout
+from pyd3.pyd3 import PyD3
+from pyd3.targetindex import TargetIndex
+
+
+class LayoutTest(unittest.TestCase):
+
+    names = [u'Artist - Album', u'Album', u'Artist - Album (2004)', u'10 - Songs']
+
+    def setUp(self):
+        self.flat_path = tempfile.mkdtemp()
+        self.fresh_path = tempfile.mkdtemp()
+        for name in self.names:
+            self.make_album(name)
+
+
+    def make_album(self, name):
+        os.mkdir(os.path.join(self.flat_path, name))
+        open(os.path.join(self.flat_path, name, '01.mp3'), 'w').close()
+
+
+    def assertMoved(self, name, layout):
+        path = os.path.join(self.flat_path, target_layout.get_layout_target_dir(layout, name), '01.mp3')
+        self.assertTrue(os.path.isfile(path), path)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.flat_path)
+        shutil.rmtree(self.fresh_path)
+
+
+    def test_migrated_and_fresh_paths_are_the_same(self):
+        for layout in ('letter', 'hash'):
+            migrated_index = TargetIndex(self.flat_path, layout)
+            fresh_index = TargetIndex(self.fresh_path, layout)
+            for name in pyd3_layout.get_album_dirs(self.flat_path):
+                migrated = pyd3_layout.get_layout_target_dir(migrated_index, name)
+                pyd3 = PyD3(os.path.join(self.flat_path, name), headless=True, layout=layout, target_index=fresh_index)
+                target_dir = pyd3.get_free_target_dir(name, self.fresh_path)
+                fresh = os.path.relpath(pyd3.get_target_tune_path(self.fresh_path, target_dir), self.fresh_path)
+                self.assertEqual(migrated, fresh)
+
+
+    def test_album_named_as_a_letter_shard_is_moved_aside_first(self):
+        self.make_album(u'A')
+        pyd3_layout.migrate(self.flat_path, 'letter')
+        for name in self.names + [u'A']:
+            self.assertMoved(name, 'letter')
+        self.assertFalse(os.path.exists(os.path.join(self.flat_path, pyd3_layout.get_aside_dir(u'A'))))
+
+
+    def test_album_named_as_a_hash_shard_is_moved_aside_first(self):
+        shard_name = target_layout.get_shard_dir('hash', self.names[0])
+        self.make_album(shard_name)
+        pyd3_layout.migrate(self.flat_path, 'hash')
+        for name in self.names + [shard_name]:
+            self.assertMoved(name, 'hash')
+
+
+if __name__ == '__main__':
+    unittest.main()
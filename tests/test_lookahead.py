@@ -0,0 +1,69 @@
+import unittest
+
+from pyd3.lookahead import LookAhead
+
+
+class LookAheadTest(unittest.TestCase):
+
+    weights = {'a': 4, 'b': 4, 'big': 20, 'c': 1}
+
+    def setUp(self):
+        self.scanned = []
+
+
+    def scan(self, item):
+        self.scanned.append(item)
+        if item == 'error': raise IOError(item)
+        return (item.upper(), self.weights[item])
+
+
+    def look_ahead(self, items, **options):
+        """Get a look ahead whose background thread already scanned all it could."""
+        look_ahead = LookAhead(items, self.scan, **options)
+        look_ahead.thread.join()
+        return look_ahead
+
+
+    def test_items_keep_their_order(self):
+        look_ahead = self.look_ahead(['a', 'b', 'c'], depth=3, budget=100)
+        self.assertEqual(list(look_ahead), [('a', 'A'), ('b', 'B'), ('c', 'C')])
+        self.assertEqual(self.scanned, ['a', 'b', 'c'])
+
+
+    def test_folder_over_the_budget_is_evicted_and_scanned_again(self):
+        look_ahead = self.look_ahead(['a', 'big', 'c'], depth=3, budget=10)
+        self.assertEqual(look_ahead.evicted, 1)
+        self.assertEqual(look_ahead.weight, 5)
+        self.assertEqual(list(look_ahead), [('a', 'A'), ('big', 'BIG'), ('c', 'C')])
+        self.assertEqual(self.scanned, ['a', 'big', 'c', 'big'])
+
+
+    def test_first_folder_is_kept_even_over_the_budget(self):
+        look_ahead = self.look_ahead(['big'], depth=3, budget=10)
+        self.assertEqual(look_ahead.evicted, 0)
+        self.assertEqual(list(look_ahead), [('big', 'BIG')])
+        self.assertEqual(self.scanned, ['big'])
+
+
+    def test_folder_estimated_over_the_budget_is_not_scanned_ahead(self):
+        look_ahead = self.look_ahead(['a', 'big', 'c'], depth=3, budget=10, estimate=lambda item: self.weights[item])
+        self.assertEqual(look_ahead.evicted, 0)
+        self.assertEqual(self.scanned, ['a', 'c'])
+        self.assertEqual(list(look_ahead), [('a', 'A'), ('big', 'BIG'), ('c', 'C')])
+
+
+    def test_no_folder_is_scanned_ahead_once_budget_is_spent(self):
+        look_ahead = self.look_ahead(['a', 'b', 'c'], depth=3, budget=8)
+        self.assertEqual(self.scanned, ['a', 'b'])
+        self.assertEqual(list(look_ahead), [('a', 'A'), ('b', 'B'), ('c', 'C')])
+
+
+    def test_scan_errors_are_raised_on_their_turn(self):
+        look_ahead = self.look_ahead(['a', 'error', 'c'], depth=3, budget=100)
+        items = iter(look_ahead)
+        self.assertEqual(next(items), ('a', 'A'))
+        self.assertRaises(IOError, next, items)
+
+
+if __name__ == '__main__':
+    unittest.main()
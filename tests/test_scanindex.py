@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyd3.scanindex import ScanIndex
+
+
+class ScanIndexTest(unittest.TestCase):
+
+    data = {'audio': {'size': 4}, 'id3': {'title': u'Title'}}
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.index_file = os.path.join(self.path, 'pyd3.index')
+        self.mp3_file = os.path.join(self.path, '01.mp3')
+        with open(self.mp3_file, 'wb') as f: f.write('abcd')
+        self.index = ScanIndex(self.index_file)
+        self.index.put(self.mp3_file, 'tune', self.data)
+
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.path)
+
+
+    def test_unchanged_file_is_hit(self):
+        (data, st) = self.index.get(self.mp3_file, 'tune')
+        self.assertEqual(data, self.data)
+        self.assertEqual(st.st_size, 4)
+
+
+    def test_data_is_kept_across_runs(self):
+        self.index.close()
+        self.index = ScanIndex(self.index_file)
+        self.assertEqual(self.index.get(self.mp3_file, 'tune')[0], self.data)
+
+
+    def test_kinds_are_indexed_apart(self):
+        self.assertEqual(self.index.get(self.mp3_file, 'image'), (None, os.stat(self.mp3_file)))
+
+
+    def test_mtime_change_invalidates_entry(self):
+        st = os.stat(self.mp3_file)
+        os.utime(self.mp3_file, (st.st_atime, st.st_mtime + 10))
+        (data, st) = self.index.get(self.mp3_file, 'tune')
+        self.assertIsNone(data)
+        self.assertIsNotNone(st)
+
+
+    def test_size_change_invalidates_entry(self):
+        st = os.stat(self.mp3_file)
+        with open(self.mp3_file, 'ab') as f: f.write('e')
+        os.utime(self.mp3_file, (st.st_atime, st.st_mtime))
+        self.assertIsNone(self.index.get(self.mp3_file, 'tune')[0])
+
+
+    def test_missing_file_is_a_miss(self):
+        os.remove(self.mp3_file)
+        self.assertEqual(self.index.get(self.mp3_file, 'tune'), (None, None))
+
+
+    def test_fingerprints_are_registered_and_unregistered(self):
+        self.index.put_fingerprint(self.mp3_file, 'f1')
+        self.assertEqual(self.index.get_fingerprint_path('f1'), self.mp3_file)
+        self.index.delete_fingerprint(self.mp3_file)
+        self.assertIsNone(self.index.get_fingerprint_path('f1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
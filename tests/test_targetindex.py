@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyd3.targetindex import TargetIndex
+
+
+class TargetIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for name in (u'Artist - Album', u'Artist - Album (2)', u'Old'):
+            os.mkdir(os.path.join(self.path, name))
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def test_existing_directories_are_taken(self):
+        index = TargetIndex(self.path)
+        self.assertTrue(index.is_taken(u'Artist - Album'))
+        self.assertTrue(index.is_taken(u'ARTIST - album'))
+        self.assertFalse(index.is_taken(u'Other - Album'))
+
+
+    def test_claimed_directories_are_taken(self):
+        index = TargetIndex(self.path)
+        index.claim(u'Other - Album')
+        self.assertFalse(os.path.exists(os.path.join(self.path, u'Other - Album')))
+        self.assertTrue(index.is_taken(u'Other - Album'))
+
+
+    def test_numbers_skip_taken_names_and_go_on(self):
+        index = TargetIndex(self.path)
+        self.assertEqual(index.get_numbered_target_dir(u'Artist - Album'), u'Artist - Album (3)')
+        index.claim(u'Artist - Album (3)')
+        self.assertEqual(index.get_numbered_target_dir(u'artist - album'), u'artist - album (4)')
+        self.assertEqual(index.get_numbered_target_dir(u'Other - Album'), u'Other - Album (2)')
+
+
+    def test_existing_directories_are_reused_once(self):
+        index = TargetIndex(self.path)
+        reuse = lambda layout_target_dir: layout_target_dir == u'Old'
+        self.assertTrue(index.is_free(u'Old', reuse))
+        self.assertFalse(index.is_free(u'Artist - Album', reuse))
+        index.claim(u'Old')
+        self.assertFalse(index.is_free(u'Old', reuse))
+
+
+    def test_names_are_checked_on_their_shard(self):
+        os.makedirs(os.path.join(self.path, u'A', u'Artist', u'Artist - Album'))
+        index = TargetIndex(self.path, 'letter')
+        self.assertTrue(index.is_taken(u'Artist - Album'))
+        self.assertFalse(index.is_taken(u'Artist - Album (2)'))
+        self.assertFalse(index.is_taken(u'Old'))
+
+
+if __name__ == '__main__':
+    unittest.main()
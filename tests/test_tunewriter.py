@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mutagen.id3 import ID3, TIT2, TPE1, TALB, APIC
+
+from pyd3 import copier
+from pyd3 import tunewriter
+from tests.mp3 import make_mp3
+
+
+class TuneWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.source_file = os.path.join(self.path, 'source.mp3')
+        self.written_file = os.path.join(self.path, 'written.mp3')
+        self.saved_file = os.path.join(self.path, 'saved.mp3')
+        make_mp3(self.source_file, [TIT2(encoding=3, text=[u'Title']), TPE1(encoding=3, text=[u'Artist'])])
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def get_id3(self, cover_size=0):
+        id3 = ID3(self.source_file)
+        id3.add(TALB(encoding=3, text=[u'Album']))
+        if cover_size:
+            id3.add(APIC(encoding=3, mime='image/jpeg', type=3, desc=u'', data='\xff'*cover_size))
+        return id3
+
+
+    def assertSameAsCopiedAndSaved(self, id3):
+        copier.copy_file(self.source_file, self.saved_file)
+        id3.save(filename=self.saved_file, v1=2)
+        self.assertTrue(tunewriter.write_tune(self.source_file, self.written_file, id3))
+        with open(self.written_file, 'rb') as written, open(self.saved_file, 'rb') as saved:
+            self.assertEqual(written.read(), saved.read())
+
+
+    def test_tag_which_fits_is_byte_identical(self):
+        self.assertSameAsCopiedAndSaved(self.get_id3())
+
+
+    def test_tag_which_grows_is_byte_identical(self):
+        self.assertSameAsCopiedAndSaved(self.get_id3(cover_size=64*1024))
+
+
+    def test_untagged_source_is_byte_identical(self):
+        make_mp3(self.source_file)
+        id3 = ID3()
+        id3.add(TIT2(encoding=3, text=[u'Title']))
+        self.assertSameAsCopiedAndSaved(id3)
+
+
+    def test_written_tune_is_unchanged(self):
+        id3 = self.get_id3()
+        tunewriter.write_tune(self.source_file, self.written_file, id3)
+        self.assertTrue(tunewriter.is_an_unchanged_tune(self.source_file, self.written_file, id3))
+        id3.add(TALB(encoding=3, text=[u'Other Album']))
+        self.assertFalse(tunewriter.is_an_unchanged_tune(self.source_file, self.written_file, id3))
+
+
+    def test_apev2_tagged_source_is_not_written(self):
+        with open(self.source_file, 'ab') as f: f.write('APETAGEX' + '\x00'*24)
+        self.assertFalse(tunewriter.write_tune(self.source_file, self.written_file, self.get_id3()))
+        self.assertFalse(os.path.exists(self.written_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import threading
+import unittest
+
+from pyd3.writerpool import WriterPool
+
+
+class WriterPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = WriterPool(threads=4, max_bytes=100)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+
+    def tearDown(self):
+        self.pool.close()
+
+
+    def write(self, item):
+        (name, weight, seconds) = item
+        with self.lock:
+            self.in_flight += weight
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(seconds)
+        with self.lock:
+            self.in_flight -= weight
+            self.calls.append(name)
+        if name == 'error': raise IOError(name)
+        return name.upper()
+
+
+    def map(self, items, get_key=None):
+        return list(self.pool.map(self.write, items, lambda item: item[1], get_key))
+
+
+    def test_results_keep_items_order(self):
+        items = [('a', 10, 0.05), ('b', 10, 0.01), ('c', 10, 0.03), ('d', 10, 0)]
+        results = self.map(items)
+        self.assertEqual([(item, result, exc) for (item, result, exc) in results],
+            [(item, item[0].upper(), None) for item in items])
+
+
+    def test_exceptions_are_returned_on_their_item(self):
+        results = self.map([('a', 10, 0), ('error', 10, 0), ('c', 10, 0)])
+        self.assertEqual([result for (item, result, exc) in results], ['A', None, 'C'])
+        self.assertIsInstance(results[1][2], IOError)
+
+
+    def test_bytes_in_flight_are_capped(self):
+        self.map([(str(i), 40, 0.02) for i in range(8)])
+        self.assertLessEqual(self.max_in_flight, 100)
+
+
+    def test_item_over_the_cap_is_written_alone(self):
+        self.map([('a', 10, 0.02), ('big', 500, 0.02), ('c', 10, 0.02)])
+        self.assertEqual(self.max_in_flight, 500)
+        self.assertEqual(self.pool.in_flight, 0)
+
+
+    def test_items_with_the_same_key_are_written_in_order(self):
+        items = [('a1', 10, 0.05), ('b', 10, 0), ('a2', 10, 0)]
+        self.map(items, lambda item: item[0][0])
+        self.assertLess(self.calls.index('a1'), self.calls.index('a2'))
+
+
+if __name__ == '__main__':
+    unittest.main()